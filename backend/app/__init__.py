@@ -40,10 +40,12 @@ def create_app():
     from app.routes.profile import profile_bp
     from app.routes.game import game_bp
     from app.routes.mpesa import mpesa_bp
+    from app.routes.leaderboard import leaderboard_bp
 
     app.register_blueprint(auth_bp, url_prefix="/auth")
     app.register_blueprint(profile_bp, url_prefix="/profile")
     app.register_blueprint(game_bp, url_prefix="/game")
     app.register_blueprint(mpesa_bp, url_prefix="/mpesa")
+    app.register_blueprint(leaderboard_bp, url_prefix="/leaderboard")
 
     return app
@@ -0,0 +1,99 @@
+import zlib
+from app import db
+from datetime import datetime
+from sqlalchemy import select, union_all
+from app.models.game import Game, GameRecord, GameStatus, GameOutcome
+
+
+# Packed moves are already ~3x smaller than SAN and rarely deflate well, so
+# the blob is tagged: RAW + packed moves, or DEFLATED + raw-deflate stream,
+# whichever is shorter
+RAW, DEFLATED = b"\x00", b"\x01"
+
+
+def compress_moves(packed):
+    """Encode a packed move blob (see app/utils/move_codec.py) for the archive."""
+    packed = bytes(packed or b"")
+    deflate = zlib.compressobj(9, zlib.DEFLATED, -15)
+    deflated = deflate.compress(packed) + deflate.flush()
+    if len(deflated) < len(packed):
+        return DEFLATED + deflated
+    return RAW + packed
+
+
+def decompress_moves(blob):
+    if not blob:
+        return b""
+    blob = bytes(blob)
+    if blob[:1] == DEFLATED:
+        return zlib.decompress(blob[1:], -15)
+    return blob[1:]
+
+
+class ArchivedGame(GameRecord, db.Model):
+    """A finished game moved out of ``games`` by services.archive.
+
+    Same columns as Game, except that the moves are kept only as a
+    compressed packed blob and the live-path indexes are left behind.
+    Rows are written once and never updated.
+    """
+
+    __tablename__ = "archived_games"
+    __table_args__ = (
+        db.Index("ix_archived_games_white_player_id_created_at", "white_player_id", "created_at"),
+        db.Index("ix_archived_games_black_player_id_created_at", "black_player_id", "created_at"),
+        db.Index("ix_archived_games_status_created_at", "status", "created_at"),
+    )
+
+    id = db.Column(db.String(36), primary_key=True)
+    white_player_id = db.Column(
+        db.String(36), db.ForeignKey("users.id"), nullable=False
+    )
+    black_player_id = db.Column(db.String(36), db.ForeignKey("users.id"), nullable=True)
+    status = db.Column(db.Enum(GameStatus, name="gamestatus"), nullable=False)
+    outcome = db.Column(db.Enum(GameOutcome, name="gameoutcome"), nullable=False)
+    is_rated = db.Column(db.Boolean, nullable=False)
+    moves_z = db.Column(db.LargeBinary, nullable=True)
+    current_fen = db.Column(db.String(100), nullable=True)
+    ply = db.Column(db.Integer, nullable=False, default=0)
+    base_time = db.Column(db.Integer, nullable=False)
+    increment = db.Column(db.Integer, nullable=False)
+    white_time_remaining = db.Column(db.Float, nullable=False)
+    black_time_remaining = db.Column(db.Float, nullable=True)
+    draw_offered_by = db.Column(db.String(36), nullable=True)
+    start_time = db.Column(db.DateTime)
+    last_move_at = db.Column(db.DateTime, nullable=True)
+    end_time = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime)
+    bet_amount = db.Column(db.BigInteger, nullable=False, default=0)  # In cents
+    bet_locked = db.Column(db.Boolean, default=False)
+    platform_fee = db.Column(db.Float, nullable=False)
+    white_bet_txn_id = db.Column(db.String(36), nullable=True)
+    black_bet_txn_id = db.Column(db.String(36), nullable=True)
+    payout_txn_id = db.Column(db.String(36), nullable=True)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    white_player = db.relationship("User", foreign_keys=[white_player_id])
+    black_player = db.relationship("User", foreign_keys=[black_player_id])
+
+    # GameRecord reads moves from here; archived moves are always packed
+    moves = ""
+
+    @property
+    def moves_packed(self):
+        return decompress_moves(self.moves_z)
+
+    def __repr__(self):
+        return f"<ArchivedGame {self.id}>"
+
+
+def game_history(*columns):
+    """Subquery over live and archived games exposing the named columns.
+
+    For readers that need every game ever played (rating replays, stats and
+    leaderboard rebuilds) rather than only the rows still in ``games``.
+    """
+    return union_all(
+        select(*(getattr(Game, name) for name in columns)),
+        select(*(getattr(ArchivedGame, name) for name in columns)),
+    ).subquery("game_history")
@@ -3,6 +3,9 @@ from app import db
 from app.models.user import User
 from datetime import datetime
 import uuid
+import chess
+from app.utils.move_codec import to_san, to_uci
+from app.utils.money import from_cents
 
 
 class GameStatus(Enum):
@@ -20,8 +23,90 @@ class GameOutcome(Enum):
     CANCELLED = "cancelled"  # 🆕 Add: For games that are cancelled
 
 
-class Game(db.Model):
+TIME_CONTROL_CATEGORIES = ("bullet", "blitz", "rapid", "classical")
+
+
+def time_control_category(base_time, increment):
+    """Bucket a time control by its estimated game length (base + 40 moves)."""
+    estimate = (base_time or 0) + 40 * (increment or 0)
+    if estimate < 180:
+        return "bullet"
+    if estimate < 480:
+        return "blitz"
+    if estimate < 1500:
+        return "rapid"
+    return "classical"
+
+
+class GameRecord:
+    """Read-side behaviour shared by live games and their archived copies."""
+
+    def san_moves(self):
+        if self.moves_packed is not None:
+            return to_san(self.moves_packed)
+        return self.moves.split() if self.moves else []
+
+    def uci_moves(self):
+        if self.moves_packed is not None:
+            return to_uci(self.moves_packed)
+        board = chess.Board()
+        uci_moves = []
+        for san in self.san_moves():
+            move = board.push_san(san)
+            uci_moves.append(move.uci())
+        return uci_moves
+
+    def to_dict(self, moves_format="san"):
+        data = {
+            "id": self.id,
+            "white_player_id": self.white_player_id,
+            "black_player_id": self.black_player_id,
+            "white_player": self.white_player.username,
+            "black_player": self.black_player.username if self.black_player else None,
+            "status": self.status.value,
+            "outcome": self.outcome.value,
+            "is_rated": self.is_rated,
+            "current_fen": self.current_fen,
+            "ply": self.ply,
+            "base_time": self.base_time,
+            "increment": self.increment,
+            "white_time_remaining": self.white_time_remaining,
+            "black_time_remaining": self.black_time_remaining,
+            "draw_offered_by": self.draw_offered_by,
+            "start_time": self.start_time.isoformat(),
+            "last_move_at": self.last_move_at.isoformat() if self.last_move_at else None,
+            "end_time": self.end_time.isoformat() if self.end_time else None,
+            "created_at": self.created_at.isoformat(),
+            "bet_amount": from_cents(self.bet_amount),
+            "bet_locked": self.bet_locked,
+            "platform_fee": self.platform_fee,
+            "white_bet_txn_id": self.white_bet_txn_id,
+            "black_bet_txn_id": self.black_bet_txn_id,
+            "payout_txn_id": self.payout_txn_id,
+        }
+        # Moves are decoded lazily, only in the format the caller asked for
+        if moves_format == "san":
+            data["moves"] = " ".join(self.san_moves())
+        elif moves_format == "uci":
+            data["moves"] = " ".join(self.uci_moves())
+        return data
+
+
+class Game(GameRecord, db.Model):
     __tablename__ = "games"
+    __table_args__ = (
+        # Keyset-paginated history and lobby listings (see services.game.get_games)
+        db.Index("ix_games_white_player_id_created_at", "white_player_id", "created_at"),
+        db.Index("ix_games_black_player_id_created_at", "black_player_id", "created_at"),
+        db.Index("ix_games_status_created_at", "status", "created_at"),
+        # Lobby and live-game lookups only ever ask for unfinished games
+        db.Index(
+            "ix_games_status_live",
+            "status",
+            postgresql_where=db.text("status IN ('PENDING', 'ACTIVE')"),
+            sqlite_where=db.text("status IN ('PENDING', 'ACTIVE')"),
+        ),
+    )
 
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     white_player_id = db.Column(
@@ -40,17 +125,24 @@ class Game(db.Model):
     )
     is_rated = db.Column(db.Boolean, default=True, nullable=False)
     moves = db.Column(db.Text, default="", nullable=False)
+    # Compact 16-bit-per-ply encoding (see app/utils/move_codec.py); when set it
+    # supersedes `moves`, which is then only kept for rows written before it
+    moves_packed = db.Column(db.LargeBinary, nullable=True)
+    # Position snapshot so readers never have to replay `moves` from move 1
+    current_fen = db.Column(db.String(100), nullable=True, default=chess.STARTING_FEN)
+    ply = db.Column(db.Integer, nullable=False, default=0)
     base_time = db.Column(db.Integer, nullable=False, default=300)
     increment = db.Column(db.Integer, nullable=False, default=0)
     white_time_remaining = db.Column(db.Float, nullable=False, default=300.0)
     black_time_remaining = db.Column(db.Float, nullable=True)
     draw_offered_by = db.Column(db.String(36), nullable=True)
     start_time = db.Column(db.DateTime, default=datetime.utcnow)
+    last_move_at = db.Column(db.DateTime, nullable=True)  # Side to move's clock runs from here
     end_time = db.Column(db.DateTime, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     # Betting fields
-    bet_amount = db.Column(db.Float, nullable=False, default=0.0)
+    bet_amount = db.Column(db.BigInteger, nullable=False, default=0)  # In cents
     bet_locked = db.Column(
         db.Boolean, default=False
     )  # 🆕 Add: True when both players' stakes are locked
@@ -72,32 +164,26 @@ class Game(db.Model):
         "User", foreign_keys=[black_player_id], backref="black_games"
     )
 
-    def to_dict(self):
+    # (san, uci) of the move make_move just applied; not persisted
+    last_move = None
+
+    def to_move_event(self):
+        """Constant-size delta for the ``move`` socket event.
+
+        ``seq`` is the ply the move produced, so a client that last saw ply N
+        and receives anything but N + 1 knows to ask for a ``resync``.
+        """
+        san, uci = self.last_move
         return {
-            "id": self.id,
-            "white_player_id": self.white_player_id,
-            "black_player_id": self.black_player_id,
-            "white_player": self.white_player.username,
-            "black_player": self.black_player.username if self.black_player else None,
-            "status": self.status.value,
-            "outcome": self.outcome.value,
-            "is_rated": self.is_rated,
-            "moves": self.moves,
-            "base_time": self.base_time,
-            "increment": self.increment,
+            "game_id": self.id,
+            "seq": self.ply,
+            "san": san,
+            "uci": uci,
+            "fen": self.current_fen,
             "white_time_remaining": self.white_time_remaining,
             "black_time_remaining": self.black_time_remaining,
-            "draw_offered_by": self.draw_offered_by,
-            "start_time": self.start_time.isoformat(),
-            "end_time": self.end_time.isoformat() if self.end_time else None,
-            "created_at": self.created_at.isoformat(),
-            "bet_amount": self.bet_amount,
-            "bet_locked": self.bet_locked,
-            "platform_fee": self.platform_fee,
-            "white_bet_txn_id": self.white_bet_txn_id,
-            "black_bet_txn_id": self.black_bet_txn_id,
-            "payout_txn_id": self.payout_txn_id,
+            "last_move_at": self.last_move_at.isoformat() if self.last_move_at else None,
         }
 
     def __repr__(self):
-        return f"<Game {self.id} - {self.white_player.username} vs {self.black_player.username if self.black_player else 'TBD'} | Bet: {self.bet_amount}>"
+        return f"<Game {self.id} - {self.white_player.username} vs {self.black_player.username if self.black_player else 'TBD'} | Bet: {from_cents(self.bet_amount)}>"
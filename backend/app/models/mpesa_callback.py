@@ -0,0 +1,25 @@
+from app import db
+from datetime import datetime
+
+
+class MpesaCallback(db.Model):
+    """An STK push callback as Safaricom delivered it.
+
+    Saved before the callback is acknowledged and applied to its deposit
+    afterwards, so a crash in between can't lose a paid deposit. One row per
+    CheckoutRequestID; redeliveries are dropped on insert. ``processed_at``
+    stays empty until the matching transaction has seen it.
+    """
+
+    __tablename__ = "mpesa_callbacks"
+
+    id = db.Column(db.Integer, primary_key=True)
+    checkout_request_id = db.Column(
+        db.String(50), nullable=False, unique=True, index=True
+    )
+    payload = db.Column(db.Text, nullable=False)  # The stkCallback object, as JSON
+    received_at = db.Column(db.DateTime, default=datetime.utcnow)
+    processed_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<MpesaCallback {self.checkout_request_id}>"
@@ -2,6 +2,7 @@ from enum import Enum
 from app import db
 from werkzeug.security import generate_password_hash, check_password_hash
 import uuid
+from app.utils.money import from_cents
 
 
 class UserRole(Enum):
@@ -25,7 +26,7 @@ class User(db.Model):
     )
     ranking = db.Column(db.Integer, default=800)
     photo_filename = db.Column(db.String(255), nullable=False, default="default.jpg")
-    wallet_balance = db.Column(db.Float, default=0.0)
+    wallet_balance = db.Column(db.BigInteger, default=0)  # In cents
     is_active = db.Column(db.Boolean, default=True)
     is_verified = db.Column(db.Boolean, default=False)
 
@@ -64,7 +65,7 @@ class User(db.Model):
             "phone_number": self.phone_number,
             "role": self.role.value,
             "ranking": self.ranking,
-            "wallet_balance": self.wallet_balance,
+            "wallet_balance": from_cents(self.wallet_balance),
             "is_active": self.is_active,
             "is_verified": self.is_verified,
             "photo_filename": self.photo_filename,
@@ -0,0 +1,50 @@
+from app import db
+from datetime import datetime
+from app.models.game import TIME_CONTROL_CATEGORIES
+from app.utils.money import from_cents
+
+
+class UserStats(db.Model):
+    """Running totals for one player, kept current as games and bets settle."""
+
+    __tablename__ = "user_stats"
+
+    user_id = db.Column(db.String(36), db.ForeignKey("users.id"), primary_key=True)
+    games_played = db.Column(db.Integer, nullable=False, default=0)
+    wins = db.Column(db.Integer, nullable=False, default=0)
+    losses = db.Column(db.Integer, nullable=False, default=0)
+    draws = db.Column(db.Integer, nullable=False, default=0)
+    bullet_games = db.Column(db.Integer, nullable=False, default=0)
+    blitz_games = db.Column(db.Integer, nullable=False, default=0)
+    rapid_games = db.Column(db.Integer, nullable=False, default=0)
+    classical_games = db.Column(db.Integer, nullable=False, default=0)
+    total_wagered = db.Column(db.BigInteger, nullable=False, default=0)  # In cents
+    net_earnings = db.Column(db.BigInteger, nullable=False, default=0)  # In cents
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    COUNTERS = (
+        "games_played",
+        "wins",
+        "losses",
+        "draws",
+        "bullet_games",
+        "blitz_games",
+        "rapid_games",
+        "classical_games",
+        "total_wagered",
+        "net_earnings",
+    )
+
+    def to_dict(self):
+        return {
+            "games_played": self.games_played or 0,
+            "wins": self.wins or 0,
+            "losses": self.losses or 0,
+            "draws": self.draws or 0,
+            "games_by_time_control": {
+                category: getattr(self, f"{category}_games") or 0
+                for category in TIME_CONTROL_CATEGORIES
+            },
+            "total_wagered": from_cents(self.total_wagered or 0),
+            "net_earnings": from_cents(self.net_earnings or 0),
+        }
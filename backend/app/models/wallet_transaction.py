@@ -1,6 +1,7 @@
 from app import db
 from datetime import datetime
 import uuid
+from app.utils.money import from_cents
 
 
 class TransactionType:
@@ -27,8 +28,10 @@ class WalletTransaction(db.Model):
     uuid = db.Column(
         db.String(36), default=lambda: str(uuid.uuid4()), unique=True, nullable=False
     )
-    user_id = db.Column(db.String(36), db.ForeignKey("users.id"), nullable=False)
-    amount = db.Column(db.Float, nullable=False)
+    user_id = db.Column(
+        db.String(36), db.ForeignKey("users.id"), nullable=False, index=True
+    )
+    amount = db.Column(db.BigInteger, nullable=False)  # In cents
     transaction_type = db.Column(
         db.String(50), nullable=False
     )  # e.g., "bet", "win", "refund"
@@ -36,17 +39,25 @@ class WalletTransaction(db.Model):
         db.String(50), nullable=True
     )  # e.g., "mpesa", "bank_card", "paypal"
     external_transaction_id = db.Column(
-        db.String(50), nullable=True
+        db.String(50), nullable=True, index=True
     )  # e.g., MPesa receipt, PayPal ID
+    checkout_request_id = db.Column(
+        db.String(50), nullable=True, unique=True, index=True
+    )  # MPesa STK push CheckoutRequestID, matched by the callback
+    phone_number = db.Column(
+        db.String(20), nullable=True
+    )  # MPesa number a queued STK push goes to, so it can be sent after a restart
     status = db.Column(
         db.String(20), nullable=True, default="pending"
     )  # e.g., "pending", "success", "failed"
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
-    game_id = db.Column(db.String(36), db.ForeignKey("games.id"), nullable=True)
+    # games.id or archived_games.id; no foreign key, since archiving moves
+    # finished games out of `games` while their ledger rows stay put
+    game_id = db.Column(db.String(36), nullable=True, index=True)
     note = db.Column(db.String(255), nullable=True)
     balance_after = db.Column(
-        db.Float, nullable=True
-    )  # For auditing user balance after tx
+        db.BigInteger, nullable=True
+    )  # For auditing user balance after tx, in cents
 
     user = db.relationship("User", backref="wallet_transactions")
 
@@ -55,13 +66,14 @@ class WalletTransaction(db.Model):
             "id": self.id,
             "uuid": self.uuid,
             "user_id": self.user_id,
-            "amount": self.amount,
+            "amount": from_cents(self.amount),
             "transaction_type": self.transaction_type,
             "payment_method": self.payment_method,
             "external_transaction_id": self.external_transaction_id,
+            "checkout_request_id": self.checkout_request_id,
             "status": self.status,
             "timestamp": self.timestamp.isoformat(),
             "game_id": self.game_id,
             "note": self.note,
-            "balance_after": self.balance_after,
+            "balance_after": from_cents(self.balance_after),
         }
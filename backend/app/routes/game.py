@@ -1,4 +1,4 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
@@ -12,8 +12,18 @@ from app.services.game import (
     offer_draw,
     accept_draw,
     decline_draw,
+    get_live_games,
+    parse_cursor,
 )
-from app.models.game import Game, GameStatus
+from app.services.lobby import get_open_games
+from app.services.pgn import export_pgn
+from app.services.matchmaking import seek, cancel_seek, seek_status
+from app.routes.socket import announce_match
+from app.models.game import Game
+from app.models.archived_game import ArchivedGame
+from app.utils.board_cache import get_board
+from app.utils.money import to_cents
+from config import Config
 
 game_bp = Blueprint("game", __name__)
 limiter = Limiter(key_func=get_remote_address)
@@ -28,7 +38,10 @@ def create_match_route():
     is_rated = data.get("is_rated", True)
     base_time = data.get("base_time", 300)
     increment = data.get("increment", 0)
-    bet_amount = data.get("bet_amount", 0.0)
+    try:
+        bet_amount = to_cents(data.get("bet_amount", 0))
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
 
     # Only self-created games supported for now (no direct challenge)
     game, message, status = create_match(
@@ -39,6 +52,56 @@ def create_match_route():
     return jsonify({"message": message, "game": game.to_dict()}), status
 
 
+@game_bp.route("/seek", methods=["POST"])
+@limiter.limit("10 per minute")
+@jwt_required()
+def seek_route():
+    user_id = get_jwt_identity()
+    data = request.get_json() or {}
+    try:
+        bet_amount = to_cents(data.get("bet_amount", 0))
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    game, message, status = seek(
+        user_id,
+        base_time=data.get("base_time", 300),
+        increment=data.get("increment", 0),
+        bet_amount=bet_amount,
+        is_rated=data.get("is_rated", True),
+        ttl=Config.MATCHMAKING_SEEK_TTL,
+    )
+    if not game:
+        return jsonify({"message": message}), status
+    # The waiting opponent may be on a socket; White's clock is already running
+    announce_match(game)
+    return jsonify({"message": message, "game": game.to_dict()}), status
+
+
+@game_bp.route("/seek", methods=["GET"])
+@limiter.limit("30 per minute")
+@jwt_required()
+def seek_status_route():
+    user_id = get_jwt_identity()
+    game_id, seeking = seek_status(user_id, ttl=Config.MATCHMAKING_SEEK_TTL)
+    if game_id:
+        game = Game.query.get(game_id)
+        return jsonify({"message": "Match found", "game": game.to_dict()}), 200
+    if seeking:
+        return jsonify({"message": "Seeking opponent"}), 202
+    return jsonify({"message": "No open seek"}), 404
+
+
+@game_bp.route("/seek/cancel", methods=["POST"])
+@limiter.limit("10 per minute")
+@jwt_required()
+def cancel_seek_route():
+    user_id = get_jwt_identity()
+    if not cancel_seek(user_id):
+        return jsonify({"message": "No open seek"}), 404
+    return jsonify({"message": "Seek cancelled"}), 200
+
+
 @game_bp.route("/join/<game_id>", methods=["POST"])
 @limiter.limit("5 per minute")
 @jwt_required()
@@ -57,15 +120,25 @@ def make_move_route(game_id):
     user_id = get_jwt_identity()
     data = request.get_json() or {}
     move_san = data.get("move")
-    move_time = data.get("move_time")  # Optional: sent by client for sync
 
     if not move_san:
         return jsonify({"message": "Move is required"}), 400
 
-    game, fen, status = make_move(user_id, game_id, move_san, move_time)
+    game, fen, status = make_move(user_id, game_id, move_san)
     if not game:
         return jsonify({"message": fen}), status
-    return jsonify({"message": "Move made", "game": game.to_dict(), "fen": fen}), 200
+    # The move list is only decoded on request; the client already has it
+    moves_format = request.args.get("moves", "none")
+    return (
+        jsonify(
+            {
+                "message": "Move made",
+                "game": game.to_dict(moves_format=moves_format),
+                "fen": fen,
+            }
+        ),
+        200,
+    )
 
 
 @game_bp.route("/resign/<game_id>", methods=["POST"])
@@ -127,9 +200,7 @@ def decline_draw_route(game_id):
 @limiter.limit("10 per minute")
 @jwt_required()
 def get_open_games_route():
-    open_games = Game.query.filter(
-        Game.status == GameStatus.PENDING, Game.black_player_id == None
-    ).all()
+    open_games = get_open_games(limit=int(request.args.get("limit", 100)))
     return (
         jsonify(
             {
@@ -138,7 +209,7 @@ def get_open_games_route():
                     if open_games
                     else "No open games found"
                 ),
-                "games": [game.to_dict() for game in open_games],
+                "games": open_games,
             }
         ),
         200,
@@ -152,10 +223,40 @@ def get_games_route():
     user_id = get_jwt_identity()
     page = int(request.args.get("page", 1))
     per_page = int(request.args.get("per_page", 20))
-    games, message, status = get_games(user_id, page, per_page)
+    moves_format = request.args.get("moves", "none")  # "san", "uci" or "none"
+    before = request.args.get("before")  # Cursor: "<created_at>,<game id>"
+    try:
+        before = parse_cursor(before) if before else None
+    except ValueError:
+        return jsonify({"message": "Invalid cursor"}), 400
+    games, message, status = get_games(
+        user_id, page, per_page, moves_format=moves_format, before=before
+    )
     if not games:
         return jsonify({"message": message}), status
-    return jsonify({"message": message, "games": games}), status
+    next_cursor = (
+        f"{games[-1]['created_at']},{games[-1]['id']}"
+        if len(games) == per_page
+        else None
+    )
+    return (
+        jsonify({"message": message, "games": games, "next_cursor": next_cursor}),
+        status,
+    )
+
+
+@game_bp.route("/export.pgn", methods=["GET"])
+@limiter.limit("2 per minute")
+@jwt_required()
+def export_pgn_route():
+    user_id = get_jwt_identity()
+    # Streamed as it is generated; the database cursor stays open until the
+    # last game is sent, so the request context must outlive this function.
+    return Response(
+        stream_with_context(export_pgn(user_id)),
+        mimetype="application/x-chess-pgn",
+        headers={"Content-Disposition": 'attachment; filename="chessearn_games.pgn"'},
+    )
 
 
 @game_bp.route("/<game_id>", methods=["GET"])
@@ -163,27 +264,34 @@ def get_games_route():
 @jwt_required()
 def get_game_route(game_id):
     user_id = get_jwt_identity()
-    game = Game.query.get(game_id)
+    game = Game.query.get(game_id) or ArchivedGame.query.get(game_id)
     if not game:
         return jsonify({"message": "Game not found"}), 404
     if user_id not in [game.white_player_id, game.black_player_id]:
         return jsonify({"message": "Unauthorized to view this game"}), 403
-    return jsonify({"message": "Game retrieved", "game": game.to_dict()}), 200
+    moves_format = request.args.get("moves", "san")  # "san", "uci" or "none"
+    return (
+        jsonify(
+            {
+                "message": "Game retrieved",
+                "game": game.to_dict(moves_format=moves_format),
+                "fen": game.current_fen or get_board(game).fen(),
+            }
+        ),
+        200,
+    )
 
 
 @game_bp.route("/my_games", methods=["GET"])
 @jwt_required()
 def get_my_games_route():
     user_id = get_jwt_identity()
-    games = Game.query.filter(
-        ((Game.white_player_id == user_id) | (Game.black_player_id == user_id)),
-        Game.status.in_([GameStatus.PENDING, GameStatus.ACTIVE]),
-    ).all()
+    games = get_live_games(user_id, request.args.get("moves", "none"))
     return (
         jsonify(
             {
                 "message": f"{len(games)} active or pending game(s) found",
-                "games": [game.to_dict() for game in games],
+                "games": games,
             }
         ),
         200,
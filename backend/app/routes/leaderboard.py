@@ -0,0 +1,69 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_limiter import Limiter
+from flask_limiter.util import get_remote_address
+from app.services.leaderboard import (
+    CATEGORIES,
+    get_top,
+    get_rank,
+    leaderboard_entries,
+)
+from app.utils.money import from_cents
+
+leaderboard_bp = Blueprint("leaderboard", __name__)
+limiter = Limiter(key_func=get_remote_address)
+
+MAX_LIMIT = 100
+
+
+def board_from_request(kind):
+    """Map /<kind>?category= to a board name, or None if it doesn't exist."""
+    category = request.args.get("category")
+    if kind == "rating" and not category:
+        return "rating"
+    if kind == "winnings":
+        if not category:
+            return "winnings"
+        if category in CATEGORIES:
+            return f"winnings:{category}"
+    return None
+
+
+@leaderboard_bp.route("/<kind>", methods=["GET"])
+@limiter.limit("30 per minute")
+@jwt_required()
+def get_leaderboard_route(kind):
+    board = board_from_request(kind)
+    if not board:
+        return jsonify({"message": "Unknown leaderboard"}), 404
+    limit = min(max(request.args.get("limit", 20, type=int), 1), MAX_LIMIT)
+    offset = max(request.args.get("offset", 0, type=int), 0)
+    rows = get_top(board, limit, offset)
+    return (
+        jsonify(
+            {
+                "message": "Leaderboard retrieved",
+                "board": board,
+                "entries": leaderboard_entries(board, rows, offset + 1),
+            }
+        ),
+        200,
+    )
+
+
+@leaderboard_bp.route("/<kind>/me", methods=["GET"])
+@limiter.limit("30 per minute")
+@jwt_required()
+def get_my_rank_route(kind):
+    board = board_from_request(kind)
+    if not board:
+        return jsonify({"message": "Unknown leaderboard"}), 404
+    rank, score = get_rank(board, get_jwt_identity())
+    if rank is None:
+        return jsonify({"message": "Not ranked on this leaderboard"}), 404
+    if board != "rating":
+        score = from_cents(score)
+    return (
+        jsonify({"message": "Rank retrieved", "board": board, "rank": rank, "score": score}),
+        200,
+    )
@@ -1,6 +1,6 @@
 from flask import Blueprint, jsonify, request, send_from_directory, current_app
 from flask_jwt_extended import jwt_required
-from app.services.profile import get_profile, update_profile_photo
+from app.services.profile import get_profile, get_user_stats, update_profile_photo
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 import os
@@ -16,7 +16,16 @@ def get_profile_route():
     user, error, status = get_profile()
     if error:
         return jsonify({"message": error}), status
-    return jsonify({"message": "Profile retrieved", "user": user.to_dict()}), status
+    return (
+        jsonify(
+            {
+                "message": "Profile retrieved",
+                "user": user.to_dict(),
+                "stats": get_user_stats(user.id).to_dict(),
+            }
+        ),
+        status,
+    )
 
 
 @profile_bp.route("/photo", methods=["POST"])
@@ -9,14 +9,27 @@ from app.services.game import (
     decline_draw,
     cancel_game,
 )
+from app.services.clock import init_clock
+from app.services.deposits import init_deposits
+from app.services.lobby import init_lobby, get_open_games, LOBBY_ROOM
+from app.services.spectators import (
+    init_spectators,
+    queue_move,
+    end_game,
+    get_snapshot,
+    invalidate,
+    watch_room,
+)
+from app.services.matchmaking import seek, cancel_seek
+from app.utils.money import to_cents
 from app.models.game import Game, GameStatus
 from app import db
-import chess
+from app.utils.board_cache import get_board
+from app.utils.active_games import active_game_ids
+from app.utils.presence import add_connection, remove_connection, get_user, user_sids
+from config import Config
 from functools import wraps
 
-# Active user socket connections
-connected_users = {}
-
 socketio = SocketIO(
     cors_allowed_origins=[
         "https://chessearn.com",
@@ -28,14 +41,72 @@ socketio = SocketIO(
 
 
 def init_socketio(app):
-    socketio.init_app(app, async_mode="eventlet")
+    # With a message queue, emits to a room reach sockets on every worker.
+    # Workers still need sticky sessions so a client's polling requests and
+    # websocket upgrade land on the process that owns its sid.
+    socketio.init_app(
+        app,
+        async_mode="eventlet",
+        message_queue=Config.SOCKETIO_MESSAGE_QUEUE or None,
+    )
+    init_clock(app, socketio, handle_flag)
+    init_spectators(socketio)
+    init_lobby(lambda event, data: socketio.emit(event, data, room=LOBBY_ROOM))
+    init_deposits(
+        app,
+        lambda user_id, data: socketio.emit(
+            "deposit_update", data, room=user_room(user_id)
+        ),
+    )
+
+
+def game_rooms(game_id):
+    """Players' room plus spectators' room, for events both should see."""
+    return [game_id, watch_room(game_id)]
+
+
+def handle_flag(game):
+    end_game(game.id)
+    socketio.emit("game_update", game.to_dict(), room=game_rooms(game.id))
+    socketio.emit(
+        "game_end",
+        {
+            "game_id": game.id,
+            "outcome": game.outcome.value,
+            "white_time_remaining": game.white_time_remaining,
+            "black_time_remaining": game.black_time_remaining,
+        },
+        room=game_rooms(game.id),
+    )
+
+
+def user_room(user_id):
+    return f"user:{user_id}"
+
+
+def join_user_to_room(user_id, room):
+    """Add every socket ``user_id`` has open, on any worker, to ``room``."""
+    for sid in user_sids(user_id):
+        socketio.server.enter_room(sid, room, namespace="/")
+
+
+def announce_match(game):
+    """Seat both players' sockets in a matched game and send them match_found.
+
+    Called for every pairing, whether the seek that made it came in over the
+    socket or REST, since the player who was left waiting may be on either.
+    """
+    game_data = game.to_dict()
+    for player_id in (game.white_player_id, game.black_player_id):
+        join_user_to_room(player_id, game.id)
+        socketio.emit("match_found", game_data, room=user_room(player_id))
 
 
 # Auth middleware for socket events
 def authenticated_socket(f):
     @wraps(f)
     def wrapper(data):
-        user_id = connected_users.get(request.sid)
+        user_id = get_user(request.sid)
         if not user_id:
             emit("error", {"message": "Not authenticated"})
             return
@@ -53,16 +124,12 @@ def handle_connect(auth):
     try:
         decoded_token = decode_token(auth["token"])
         user_id = decoded_token["sub"]
-        connected_users[request.sid] = user_id
+        add_connection(request.sid, user_id)
+        join_room(user_room(user_id))
         print(f"Authenticated user: {user_id}")
 
-        games = Game.query.filter(
-            (Game.white_player_id == user_id) | (Game.black_player_id == user_id),
-            Game.status == GameStatus.ACTIVE,
-        ).all()
-        for game in games:
-            join_room(game.id)
-            print(f"Joined room for game {game.id}")
+        for game_id in active_game_ids(user_id):
+            join_room(game_id)
     except Exception as e:
         print(f"Socket auth failed: {e}")
         return False
@@ -70,14 +137,11 @@ def handle_connect(auth):
 
 @socketio.on("disconnect")
 def handle_disconnect():
-    user_id = connected_users.pop(request.sid, None)
+    user_id = remove_connection(request.sid)
     if user_id:
-        games = Game.query.filter(
-            (Game.white_player_id == user_id) | (Game.black_player_id == user_id),
-            Game.status == GameStatus.ACTIVE,
-        ).all()
-        for game in games:
-            leave_room(game.id)
+        # Socket.IO drops the sid from its rooms itself; only other tabs matter
+        if not user_sids(user_id):
+            cancel_seek(user_id)
 
 
 @socketio.on("make_move")
@@ -85,22 +149,22 @@ def handle_disconnect():
 def handle_make_move(user_id, data):
     game_id = data.get("game_id")
     move_san = data.get("move_san")
-    move_time = data.get("move_time")
 
     if not game_id or not move_san:
         emit("error", {"message": "Missing game_id or move_san"})
         return
 
-    game, fen, status = make_move(user_id, game_id, move_san, move_time)
+    game, fen, status = make_move(user_id, game_id, move_san)
     if not game:
         emit("error", {"message": fen})
         return
 
-    game_data = game.to_dict()
-    game_data["fen"] = fen
-    emit("game_update", game_data, room=game_id)
+    move_event = game.to_move_event()
+    emit("move", move_event, room=game_id)
+    queue_move(move_event)
 
     if game.status == GameStatus.COMPLETED:
+        end_game(game.id)
         emit(
             "game_end",
             {
@@ -109,7 +173,7 @@ def handle_make_move(user_id, data):
                 "white_time_remaining": game.white_time_remaining,
                 "black_time_remaining": game.black_time_remaining,
             },
-            room=game_id,
+            room=game_rooms(game_id),
         )
 
 
@@ -125,9 +189,10 @@ def handle_resign(user_id, data):
     if not game:
         emit("error", {"message": message})
         return
+    end_game(game.id)
 
     game_data = game.to_dict()
-    emit("game_update", game_data, room=game_id)
+    emit("game_update", game_data, room=game_rooms(game_id))
     emit(
         "game_end",
         {
@@ -136,7 +201,7 @@ def handle_resign(user_id, data):
             "white_time_remaining": game.white_time_remaining,
             "black_time_remaining": game.black_time_remaining,
         },
-        room=game_id,
+        room=game_rooms(game_id),
     )
 
 
@@ -152,9 +217,10 @@ def handle_cancel_game(user_id, data):
     if not game:
         emit("error", {"message": message})
         return
+    end_game(game.id)
 
     game_data = game.to_dict()
-    emit("game_cancelled", game_data, room=game_id)
+    emit("game_cancelled", game_data, room=game_rooms(game_id))
 
 
 @socketio.on("offer_draw")
@@ -169,8 +235,13 @@ def handle_offer_draw(user_id, data):
     if not game:
         emit("error", {"message": message})
         return
+    invalidate(game.id)
 
-    emit("draw_offered", {"game_id": game.id, "offered_by": user_id}, room=game_id)
+    emit(
+        "draw_offered",
+        {"game_id": game.id, "offered_by": user_id},
+        room=game_rooms(game_id),
+    )
 
 
 @socketio.on("accept_draw")
@@ -185,9 +256,10 @@ def handle_accept_draw(user_id, data):
     if not game:
         emit("error", {"message": message})
         return
+    end_game(game.id)
 
     game_data = game.to_dict()
-    emit("game_update", game_data, room=game_id)
+    emit("game_update", game_data, room=game_rooms(game_id))
     emit(
         "game_end",
         {
@@ -196,7 +268,7 @@ def handle_accept_draw(user_id, data):
             "white_time_remaining": game.white_time_remaining,
             "black_time_remaining": game.black_time_remaining,
         },
-        room=game_id,
+        room=game_rooms(game_id),
     )
 
 
@@ -212,8 +284,13 @@ def handle_decline_draw(user_id, data):
     if not game:
         emit("error", {"message": message})
         return
+    invalidate(game.id)
 
-    emit("draw_declined", {"game_id": game.id, "declined_by": user_id}, room=game_id)
+    emit(
+        "draw_declined",
+        {"game_id": game.id, "declined_by": user_id},
+        room=game_rooms(game_id),
+    )
 
 
 @socketio.on("spectate")
@@ -232,12 +309,76 @@ def handle_spectate(user_id, data):
         emit("error", {"message": "Game is not active"})
         return
 
-    join_room(game_id)
-    # Send current game state to the spectator
-    board = chess.Board()
-    if game.moves:
-        for move in game.moves.split():
-            board.push_san(move)
+    join_room(watch_room(game_id))
+    # Shared snapshot; batched "moves" events follow on the watch room
+    emit("game_update", get_snapshot(game))
+
+
+@socketio.on("seek")
+@authenticated_socket
+def handle_seek(user_id, data):
+    try:
+        bet_amount = to_cents(data.get("bet_amount", 0))
+    except ValueError as e:
+        emit("error", {"message": str(e)})
+        return
+
+    game, message, status = seek(
+        user_id,
+        base_time=data.get("base_time", 300),
+        increment=data.get("increment", 0),
+        bet_amount=bet_amount,
+        is_rated=data.get("is_rated", True),
+    )
+    if not game:
+        if status == 202:
+            emit("seeking", {"message": message})
+        else:
+            emit("error", {"message": message})
+        return
+    announce_match(game)
+
+
+@socketio.on("cancel_seek")
+@authenticated_socket
+def handle_cancel_seek(user_id, data):
+    if cancel_seek(user_id):
+        emit("seek_cancelled", {"message": "Seek cancelled"})
+    else:
+        emit("error", {"message": "No open seek"})
+
+
+@socketio.on("resync")
+@authenticated_socket
+def handle_resync(user_id, data):
+    """Send a full snapshot to a client that spotted a gap in ``move`` seqs."""
+    game_id = data.get("game_id")
+    if not game_id:
+        emit("error", {"message": "Missing game_id"})
+        return
+
+    game = Game.query.get(game_id)
+    if not game:
+        emit("error", {"message": "Game not found"})
+        return
+    is_player = user_id in [game.white_player_id, game.black_player_id]
+    if not is_player and game.status != GameStatus.ACTIVE:
+        emit("error", {"message": "Game is not active"})
+        return
+
     game_data = game.to_dict()
-    game_data["fen"] = board.fen()
+    game_data["fen"] = game.current_fen or get_board(game).fen()
     emit("game_update", game_data)
+
+
+@socketio.on("join_lobby")
+@authenticated_socket
+def handle_join_lobby(user_id, data):
+    join_room(LOBBY_ROOM)
+    emit("lobby_snapshot", {"games": get_open_games()})
+
+
+@socketio.on("leave_lobby")
+@authenticated_socket
+def handle_leave_lobby(user_id, data):
+    leave_room(LOBBY_ROOM)
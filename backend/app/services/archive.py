@@ -0,0 +1,52 @@
+# app/services/archive.py
+from datetime import datetime, timedelta
+from sqlalchemy import delete, insert, select
+from app import db
+from app.models.game import Game, GameStatus
+from app.models.archived_game import ArchivedGame, compress_moves
+from app.utils.move_codec import pack_san
+from config import Config
+
+FINISHED = (GameStatus.COMPLETED, GameStatus.CANCELLED)
+
+
+def _archived_row(row):
+    row = dict(row._mapping)
+    moves, packed = row.pop("moves"), row.pop("moves_packed")
+    if packed is None and moves:
+        packed = pack_san(moves.split())
+    row["moves_z"] = compress_moves(packed) if packed else None
+    return row
+
+
+def archive_games(older_than_days=None, batch_size=None):
+    """Move finished games created more than ``older_than_days`` ago to the archive.
+
+    Each batch of ``batch_size`` games is copied into ``archived_games`` and
+    deleted from ``games`` in one transaction, so a game is always in exactly
+    one of the two tables and a failure loses at most the batch in flight.
+    Batches walk the ``(status, created_at)`` index oldest first. Returns the
+    number of games archived.
+    """
+    older_than_days = Config.ARCHIVE_AFTER_DAYS if older_than_days is None else older_than_days
+    batch_size = batch_size or Config.ARCHIVE_BATCH_SIZE
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    total = 0
+    while True:
+        rows = db.session.execute(
+            select(Game.__table__)
+            .where(Game.status.in_(FINISHED), Game.created_at < cutoff)
+            .order_by(Game.created_at, Game.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        ).all()
+        if not rows:
+            return total
+        now = datetime.utcnow()
+        archived = [{**_archived_row(row), "archived_at": now} for row in rows]
+        db.session.execute(insert(ArchivedGame), archived)
+        db.session.execute(
+            delete(Game).where(Game.id.in_([row["id"] for row in archived]))
+        )
+        db.session.commit()
+        total += len(archived)
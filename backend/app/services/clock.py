@@ -0,0 +1,99 @@
+# app/services/clock.py
+import heapq
+from datetime import datetime
+from threading import Lock
+from app import db
+from app.models.game import Game, GameStatus
+from config import Config
+
+# Min-heap of (deadline, game_id, ply), deadlines in seconds since the epoch
+# (UTC). Entries are never removed when a game moves on; instead _armed keeps
+# the ply of each game's newest deadline, and older entries are dropped when
+# they surface without touching the database.
+_deadlines = []
+_armed = {}  # game_id -> ply
+_lock = Lock()
+_started = False
+EPOCH = datetime(1970, 1, 1)
+
+
+def utc_seconds(moment):
+    """Seconds since the epoch for a naive UTC datetime, whatever the local TZ."""
+    return (moment - EPOCH).total_seconds()
+
+
+def schedule_flag(game):
+    """Arm the clock of the side to move in ``game``."""
+    if not game.last_move_at:
+        return
+    ply = game.ply or 0
+    remaining = (
+        game.white_time_remaining if ply % 2 == 0 else game.black_time_remaining
+    )
+    if remaining is None:
+        return
+    deadline = utc_seconds(game.last_move_at) + remaining
+    with _lock:
+        _armed[game.id] = ply
+        heapq.heappush(_deadlines, (deadline, game.id, ply))
+
+
+def disarm_flag(game_id):
+    """Forget ``game_id``'s deadline; its heap entries are dropped as they fire."""
+    with _lock:
+        _armed.pop(game_id, None)
+
+
+def _pop_due(now):
+    due = []
+    with _lock:
+        while _deadlines and _deadlines[0][0] <= now:
+            deadline, game_id, ply = heapq.heappop(_deadlines)
+            if _armed.get(game_id) != ply:
+                continue  # Superseded by a later move here, or the game ended
+            # flag_game re-arms the game if its clock turns out to have time left
+            del _armed[game_id]
+            due.append((game_id, ply))
+    return due
+
+
+def _next_sleep(now):
+    with _lock:
+        if not _deadlines:
+            return Config.CLOCK_TICK
+        return min(max(_deadlines[0][0] - now, 0), Config.CLOCK_TICK)
+
+
+def init_clock(app, socketio, on_flag):
+    """Start the clock loop as a background task of ``socketio``.
+
+    Active games are armed once at startup; after that deadlines are only
+    pushed by moves and joins, so the loop itself never polls the database.
+    ``on_flag`` is called with each game that lost on time.
+    """
+    global _started
+    if _started:
+        return
+    _started = True
+
+    from app.services.game import flag_game
+
+    def run():
+        with app.app_context():
+            for game in Game.query.filter(Game.status == GameStatus.ACTIVE):
+                schedule_flag(game)
+        while True:
+            now = utc_seconds(datetime.utcnow())
+            for game_id, ply in _pop_due(now):
+                with app.app_context():
+                    try:
+                        game = flag_game(game_id, ply)
+                        if game:
+                            on_flag(game)
+                    except Exception as e:
+                        print(f"Clock flag failed for game {game_id}: {e}")
+                    finally:
+                        db.session.remove()
+            socketio.sleep(_next_sleep(utc_seconds(datetime.utcnow())))
+
+    socketio.start_background_task(run)
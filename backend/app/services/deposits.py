@@ -0,0 +1,303 @@
+# app/services/deposits.py
+import json
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+import requests
+from sqlalchemy.dialects import postgresql, sqlite
+from app import db
+from app.models.mpesa_callback import MpesaCallback
+from app.models.user import User
+from app.models.wallet_transaction import (
+    WalletTransaction,
+    TransactionType,
+    PaymentMethod,
+)
+from app.utils.money import to_cents
+from app.utils.wallet import (
+    adjust_balance,
+    stage_wallet_transaction,
+    send_mpesa_stk_push,
+    validate_phone_number,
+)
+from config import Config
+
+# Deposits are accepted by writing a pending ledger row and queueing its id;
+# a small pool of worker threads performs the STK push, so a slow Daraja
+# never holds a request worker. A row with no checkout_request_id has not
+# been sent yet, which makes the ledger itself the durable job list: a
+# periodic sweep re-queues unsent rows a restarted process dropped. The
+# workers are plain threads (green ones under run.py's monkey patching), so
+# they run under passenger_wsgi.py too. Callbacks are saved to
+# mpesa_callbacks before they are acknowledged and applied by the same
+# workers; one that arrives before its push recorded the CheckoutRequestID
+# is applied by that push, or failing that by the sweep.
+_jobs = queue.Queue()
+_app = None
+_notify = None
+_started = False
+
+# Unsent rows this old were dropped by a restarted process and are sent
+# again; longer than a push takes with all its retries
+RESEND_AFTER = timedelta(minutes=2)
+# ...and past this a late STK prompt would only confuse the user
+STALE_AFTER = timedelta(minutes=10)
+QUEUED_NOTE = "MPesa STK Push queued: "
+
+
+def init_deposits(app, notify):
+    """Register the app and ``notify(user_id, data)`` with the deposit service.
+
+    ``notify`` is called when a push is sent, when it fails, and when the
+    callback settles the deposit. No threads are started here, since every
+    create_app() caller (scripts, CLI commands) gets here; the serving
+    entrypoints call start_deposit_workers().
+    """
+    global _app, _notify
+    _app, _notify = app, notify
+
+
+def start_deposit_workers():
+    """Start the STK push workers and the deposit sweep in this process."""
+    global _started
+    if _started:
+        return
+    _started = True
+    _spawn(_sweeper)
+    for _ in range(Config.DEPOSIT_WORKERS):
+        _spawn(_worker)
+
+
+def _spawn(target, *args):
+    threading.Thread(target=target, args=args, daemon=True).start()
+
+
+def sweep_unsent():
+    """Re-queue pending deposits that were never sent, and fail stale ones."""
+    now = datetime.utcnow()
+    unsent = WalletTransaction.query.filter(
+        WalletTransaction.transaction_type == TransactionType.DEPOSIT,
+        WalletTransaction.payment_method == PaymentMethod.MPESA,
+        WalletTransaction.status == "pending",
+        WalletTransaction.checkout_request_id.is_(None),
+        WalletTransaction.external_transaction_id.is_(None),
+    )
+    unsent.filter(WalletTransaction.timestamp < now - STALE_AFTER).update(
+        {"status": "failed", "note": "MPesa STK Push was never sent"},
+        synchronize_session=False,
+    )
+    resend = unsent.filter(
+        WalletTransaction.timestamp >= now - STALE_AFTER,
+        WalletTransaction.timestamp < now - RESEND_AFTER,
+    ).with_entities(WalletTransaction.id)
+    tx_ids = [tx_id for (tx_id,) in resend]
+    db.session.commit()
+    for tx_id in tx_ids:
+        _jobs.put((_push, (tx_id, 1)))
+
+
+def sweep_callbacks():
+    """Apply saved callbacks whose deposit has since recorded its checkout."""
+    checkout_ids = [
+        checkout_request_id
+        for (checkout_request_id,) in db.session.query(
+            MpesaCallback.checkout_request_id
+        )
+        .join(
+            WalletTransaction,
+            WalletTransaction.checkout_request_id == MpesaCallback.checkout_request_id,
+        )
+        .filter(MpesaCallback.processed_at.is_(None))
+    ]
+    for checkout_request_id in checkout_ids:
+        apply_callback(checkout_request_id)
+
+
+def _sweeper():
+    while True:
+        for sweep in (sweep_unsent, sweep_callbacks):
+            with _app.app_context():
+                try:
+                    sweep()
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"Deposit sweep {sweep.__name__} failed: {e}")
+                finally:
+                    db.session.remove()
+        time.sleep(Config.DEPOSIT_SWEEP_INTERVAL)
+
+
+def notify_deposit(tx, stage):
+    if _notify:
+        _notify(tx.user_id, {"stage": stage, "transaction": tx.to_dict()})
+
+
+def request_deposit(user, amount, phone_number=None, note="Wallet Deposit"):
+    """Record a pending deposit of ``amount`` cents and queue its STK push."""
+    try:
+        phone = validate_phone_number(phone_number or user.phone_number)
+    except ValueError as e:
+        return None, str(e), 400
+    tx = stage_wallet_transaction(
+        user_id=user.id,
+        amount=amount,
+        transaction_type=TransactionType.DEPOSIT,
+        note=f"{QUEUED_NOTE}{note}",
+        balance_after=user.wallet_balance,
+        payment_method=PaymentMethod.MPESA,
+        status="pending",
+    )
+    tx.phone_number = phone
+    db.session.commit()
+    _jobs.put((_push, (tx.id, 1)))
+    return tx, "STK Push queued. Please check your phone shortly.", 202
+
+
+def _transient(error):
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    response = getattr(error, "response", None)
+    return response is not None and (
+        response.status_code == 429 or response.status_code >= 500
+    )
+
+
+def _retry_later(job, delay):
+    def requeue():
+        time.sleep(delay)
+        _jobs.put(job)
+
+    _spawn(requeue)
+
+
+def _fail(tx, note):
+    tx.status = "failed"
+    tx.note = note
+    db.session.commit()
+    notify_deposit(tx, "failed")
+
+
+def _push(tx_id, attempt):
+    # Claim the row so a sweep in another process can't send it twice
+    tx = (
+        WalletTransaction.query.filter(
+            WalletTransaction.id == tx_id,
+            WalletTransaction.status == "pending",
+            WalletTransaction.checkout_request_id.is_(None),
+        )
+        .with_for_update(skip_locked=True)
+        .first()
+    )
+    if not tx:
+        return
+    phone = tx.phone_number or db.session.get(User, tx.user_id).phone_number
+    note = (tx.note or "").removeprefix(QUEUED_NOTE) or "Wallet Deposit"
+    try:
+        result = send_mpesa_stk_push(tx.user_id, tx.amount, phone, note)
+    except requests.RequestException as e:
+        if attempt < Config.DEPOSIT_MAX_ATTEMPTS and _transient(e):
+            db.session.rollback()
+            delay = Config.DEPOSIT_RETRY_BACKOFF * 2 ** (attempt - 1)
+            _retry_later((_push, (tx_id, attempt + 1)), delay)
+            return
+        _fail(tx, f"Failed to initiate STK Push: {str(e)}"[:255])
+        return
+    if result.get("ResponseCode") != "0":
+        _fail(tx, f"STK Push failed: {result.get('ResponseDescription')}"[:255])
+        return
+    tx.checkout_request_id = result.get("CheckoutRequestID")
+    tx.note = f"MPesa STK Push initiated: {note}"
+    db.session.commit()
+    notify_deposit(tx, "sent")
+    # The callback may have arrived while the push was in flight
+    apply_callback(tx.checkout_request_id)
+
+
+def _insert():
+    if db.session.get_bind().dialect.name == "postgresql":
+        return postgresql.insert
+    return sqlite.insert
+
+
+def record_callback(result):
+    """Save an ``stkCallback`` body and queue it to be applied to its deposit.
+
+    Safaricom may deliver a callback more than once; only the first delivery
+    for a CheckoutRequestID is kept. The caller acknowledges once this
+    returns, so only a failure to save makes Safaricom deliver it again.
+    """
+    checkout_request_id = result.get("CheckoutRequestID")
+    stmt = _insert()(MpesaCallback).values(
+        checkout_request_id=checkout_request_id,
+        payload=json.dumps(result),
+        received_at=datetime.utcnow(),
+    )
+    db.session.execute(
+        stmt.on_conflict_do_nothing(index_elements=[MpesaCallback.checkout_request_id])
+    )
+    db.session.commit()
+    _jobs.put((apply_callback, (checkout_request_id,)))
+
+
+def _callback_item(result, name):
+    items = result.get("CallbackMetadata", {}).get("Item", [])
+    return next((item.get("Value") for item in items if item.get("Name") == name), None)
+
+
+def apply_callback(checkout_request_id):
+    """Apply the saved callback for ``checkout_request_id`` to its deposit.
+
+    Does nothing while no transaction has that checkout id yet. A callback
+    for a deposit that is no longer pending is only marked processed.
+    """
+    tx = (
+        WalletTransaction.query.filter_by(checkout_request_id=checkout_request_id)
+        .with_for_update()
+        .first()
+    )
+    if not tx:
+        return
+    callback = (
+        MpesaCallback.query.filter_by(
+            checkout_request_id=checkout_request_id, processed_at=None
+        )
+        .with_for_update()
+        .first()
+    )
+    if not callback:
+        return
+    settled = tx.status == "pending"
+    if settled:
+        _settle(tx, json.loads(callback.payload))
+    callback.processed_at = datetime.utcnow()
+    db.session.commit()
+    if settled:
+        notify_deposit(tx, "settled")
+
+
+def _settle(tx, result):
+    result_desc = result.get("ResultDesc")
+    if result.get("ResultCode") == 0:
+        user = db.session.get(User, tx.user_id)
+        amount = _callback_item(result, "Amount") or 0
+        tx.status = "success"
+        tx.external_transaction_id = _callback_item(result, "MpesaReceiptNumber")
+        tx.note = f"MPesa deposit successful: {result_desc}"[:255]
+        tx.balance_after = adjust_balance(user, to_cents(amount))
+    else:
+        tx.status = "failed"
+        tx.note = f"MPesa deposit failed: {result_desc}"[:255]
+
+
+def _worker():
+    while True:
+        handler, args = _jobs.get()
+        with _app.app_context():
+            try:
+                handler(*args)
+            except Exception as e:
+                db.session.rollback()
+                print(f"Deposit job {handler.__name__} failed: {e}")
+            finally:
+                db.session.remove()
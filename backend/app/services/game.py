@@ -1,12 +1,44 @@
 from app.models.game import Game, GameStatus, GameOutcome
+from app.models.archived_game import ArchivedGame
 from app.models.user import User
 from app import db
 import chess
+import heapq
 from datetime import datetime
+from itertools import islice
+from sqlalchemy import select, tuple_, union_all
+from sqlalchemy.orm import joinedload
 from app.utils.wallet import handle_wallet_bet, distribute_winnings, refund_bets
-
-
-def create_match(user_id, is_rated=True, base_time=300, increment=0, bet_amount=0.0):
+from app.utils.board_cache import get_board, set_board, evict_board
+from app.utils.move_codec import encode_move, pack_san
+from app.services.clock import schedule_flag, disarm_flag
+from app.utils.active_games import track_game, untrack_game
+from app.utils.user_stats import record_game_result
+from app.services.lobby import add_open_game, remove_open_game
+from app.services.rating import update_ratings
+from app.services.leaderboard import record_game
+from config import Config
+
+def close_game(game):
+    """Drop per-process state for a game that has just finished."""
+    evict_board(game.id)
+    disarm_flag(game.id)
+    untrack_game(game)
+    record_game(game)
+
+
+def locked_game(game_id):
+    """Load ``game_id`` fresh with its row locked until the caller commits.
+
+    Every path that can end a game goes through this, so a move, a resign or
+    a draw racing the clock's flag_game is serialized on the row and the
+    loser of the race sees the game already finished instead of settling it
+    a second time.
+    """
+    return Game.query.with_for_update().populate_existing().get(game_id)
+
+
+def create_match(user_id, is_rated=True, base_time=300, increment=0, bet_amount=0):
     user = User.query.get(user_id)
     if not user:
         return None, "User not found", 404
@@ -17,10 +49,6 @@ def create_match(user_id, is_rated=True, base_time=300, increment=0, bet_amount=
     if bet_amount > 0 and user.wallet_balance < bet_amount:
         return None, "Insufficient balance to fund bet", 400
 
-    # Deduct bet and lock as escrow
-    if bet_amount > 0:
-        handle_wallet_bet(user, bet_amount)
-
     game = Game(
         white_player_id=user_id,
         status=GameStatus.PENDING,
@@ -31,15 +59,29 @@ def create_match(user_id, is_rated=True, base_time=300, increment=0, bet_amount=
         black_time_remaining=None,
         bet_amount=bet_amount,
         bet_locked=bool(bet_amount > 0),
+        current_fen=chess.STARTING_FEN,
+        ply=0,
+        moves_packed=b"" if Config.MOVE_ENCODING == "packed" else None,
     )
     db.session.add(game)
+
+    # Deduct bet and lock as escrow, committed together with the game
+    if bet_amount > 0:
+        db.session.flush()
+        try:
+            game.white_bet_txn_id = handle_wallet_bet(user, bet_amount, game.id).uuid
+        except ValueError:
+            db.session.rollback()
+            return None, "Insufficient balance to fund bet", 400
     db.session.commit()
+    track_game(game)
+    add_open_game(game, user)
     return game, "Match created", 201
 
 
 def join_match(user_id, game_id):
     user = User.query.get(user_id)
-    game = Game.query.get(game_id)
+    game = locked_game(game_id)  # One joiner per game
     if not user:
         return None, "User not found", 404
     if not game:
@@ -53,18 +95,84 @@ def join_match(user_id, game_id):
 
     # Deduct bet and lock as escrow
     if game.bet_amount > 0:
-        handle_wallet_bet(user, game.bet_amount)
+        try:
+            game.black_bet_txn_id = handle_wallet_bet(
+                user, game.bet_amount, game.id
+            ).uuid
+        except ValueError:
+            db.session.rollback()
+            return None, "Insufficient balance to join bet", 400
         game.bet_locked = True
 
     game.black_player_id = user_id
     game.black_time_remaining = float(game.base_time)
     game.status = GameStatus.ACTIVE
+    game.last_move_at = datetime.utcnow()  # White's clock starts now
     db.session.commit()
+    track_game(game)
+    remove_open_game(game.id)
+    schedule_flag(game)
     return game, "Joined match", 200
 
 
-def make_move(user_id, game_id, move_san, move_time=None):
-    game = Game.query.get(game_id)
+def create_paired_match(
+    white_id, black_id, is_rated=True, base_time=300, increment=0, bet_amount=0
+):
+    """Start a game between two matched players in a single transaction.
+
+    Both seats are filled, both stakes debited and the game goes straight to
+    ACTIVE without ever being listed in the lobby, so no third player can
+    take a seat. If either stake can't be debited nothing is written.
+    """
+    if base_time <= 0 or increment < 0:
+        return None, "Invalid time controls", 400
+    if bet_amount < 0:
+        return None, "Bet amount cannot be negative", 400
+    players = {user.id: user for user in User.query.filter(User.id.in_([white_id, black_id]))}
+    if len(players) != 2:
+        return None, "User not found", 404
+
+    now = datetime.utcnow()
+    game = Game(
+        white_player_id=white_id,
+        black_player_id=black_id,
+        status=GameStatus.ACTIVE,
+        is_rated=is_rated,
+        base_time=base_time,
+        increment=increment,
+        white_time_remaining=float(base_time),
+        black_time_remaining=float(base_time),
+        bet_amount=bet_amount,
+        bet_locked=bool(bet_amount > 0),
+        current_fen=chess.STARTING_FEN,
+        ply=0,
+        moves_packed=b"" if Config.MOVE_ENCODING == "packed" else None,
+        start_time=now,
+        last_move_at=now,  # White's clock starts now
+    )
+    db.session.add(game)
+
+    if bet_amount > 0:
+        db.session.flush()
+        try:
+            # Wallets in user id order, like every other two-player settlement
+            for user_id in sorted(players):
+                txn_id = handle_wallet_bet(players[user_id], bet_amount, game.id).uuid
+                if user_id == white_id:
+                    game.white_bet_txn_id = txn_id
+                else:
+                    game.black_bet_txn_id = txn_id
+        except ValueError:
+            db.session.rollback()
+            return None, "Insufficient balance to fund bet", 400
+    db.session.commit()
+    track_game(game)
+    schedule_flag(game)
+    return game, "Match started", 201
+
+
+def make_move(user_id, game_id, move_san):
+    game = locked_game(game_id)
     if not game:
         return None, "Game not found", 404
     if game.status != GameStatus.ACTIVE:
@@ -72,11 +180,7 @@ def make_move(user_id, game_id, move_san, move_time=None):
     if user_id not in [game.white_player_id, game.black_player_id]:
         return None, "You are not a player in this game", 403
 
-    # Initialize chess board
-    board = chess.Board()
-    if game.moves:
-        for move in game.moves.split():
-            board.push_san(move)
+    board = get_board(game)
 
     is_white_turn = board.turn == chess.WHITE
     user_is_white = game.white_player_id == user_id
@@ -87,15 +191,25 @@ def make_move(user_id, game_id, move_san, move_time=None):
         move = board.parse_san(move_san)
         if move not in board.legal_moves:
             return None, "Invalid move", 400
+        game.last_move = (board.san(move), move.uci())
         board.push(move)
-        game.moves = (game.moves + " " + move_san).strip() if game.moves else move_san
+        # A row that already has packed moves stays packed; MOVE_ENCODING
+        # only decides the format of new games and of legacy text rows
+        if game.moves_packed is not None or Config.MOVE_ENCODING == "packed":
+            if game.moves_packed is None:
+                game.moves_packed = pack_san(game.san_moves())
+            game.moves_packed = bytes(game.moves_packed) + encode_move(move)
+        else:
+            game.moves = (game.moves + " " + move_san).strip() if game.moves else move_san
     except ValueError:
         return None, "Invalid move format", 400
+    game.ply = (game.ply or 0) + 1
+    game.current_fen = board.fen()
+    set_board(game.id, game.ply, board)
 
-    # Time controls
-    current_time = move_time if move_time is not None else datetime.utcnow().timestamp()
-    last_time = game.start_time.timestamp() if game.start_time else current_time
-    time_used = current_time - last_time
+    # Time controls, on the server's clock only; all times are naive UTC
+    now = datetime.utcnow()
+    time_used = (now - (game.last_move_at or game.start_time or now)).total_seconds()
 
     if user_is_white:
         game.white_time_remaining = max(
@@ -110,7 +224,8 @@ def make_move(user_id, game_id, move_san, move_time=None):
 
     # Start time on first move
     if not game.start_time:
-        game.start_time = datetime.fromtimestamp(current_time)
+        game.start_time = now
+    game.last_move_at = now
 
     # End game if timeout or checkmate
     end = False
@@ -139,16 +254,57 @@ def make_move(user_id, game_id, move_san, move_time=None):
             game.outcome = GameOutcome.DRAW
 
     if end:
-        game.end_time = datetime.fromtimestamp(current_time)
-        db.session.commit()
+        game.end_time = now
+        update_ratings(game)
+        record_game_result(game)
         distribute_winnings(game)
+        db.session.commit()  # Game result and payout settle together
+        close_game(game)
     else:
         db.session.commit()
+        schedule_flag(game)
     return game, board.fen(), 200
 
 
+def flag_game(game_id, ply):
+    """Complete ``game_id`` on time if the side to move at ``ply`` has run out.
+
+    Called by the clock loop when a deadline fires; returns the finished game,
+    or None if the game moved on, ended some other way, or still has time.
+    """
+    # Locked so two workers whose clocks fire together can't both settle it
+    game = locked_game(game_id)
+    if not game or game.status != GameStatus.ACTIVE or (game.ply or 0) != ply:
+        return None
+
+    now = datetime.utcnow()
+    elapsed = (now - (game.last_move_at or game.start_time)).total_seconds()
+    white_to_move = ply % 2 == 0
+    remaining = (
+        game.white_time_remaining if white_to_move else game.black_time_remaining
+    ) - elapsed
+    if remaining > 0:
+        schedule_flag(game)
+        return None
+
+    if white_to_move:
+        game.white_time_remaining = 0
+        game.outcome = GameOutcome.BLACK_WIN
+    else:
+        game.black_time_remaining = 0
+        game.outcome = GameOutcome.WHITE_WIN
+    game.status = GameStatus.COMPLETED
+    game.end_time = now
+    update_ratings(game)
+    record_game_result(game)
+    distribute_winnings(game)
+    db.session.commit()
+    close_game(game)
+    return game
+
+
 def resign_game(user_id, game_id):
-    game = Game.query.get(game_id)
+    game = locked_game(game_id)
     if not game:
         return None, "Game not found", 404
     if game.status != GameStatus.ACTIVE:
@@ -163,13 +319,16 @@ def resign_game(user_id, game_id):
     else:
         game.outcome = GameOutcome.WHITE_WIN
 
-    db.session.commit()
+    update_ratings(game)
+    record_game_result(game)
     distribute_winnings(game)
+    db.session.commit()
+    close_game(game)
     return game, "Game resigned", 200
 
 
 def cancel_game(user_id, game_id):
-    game = Game.query.get(game_id)
+    game = locked_game(game_id)
     if not game:
         return None, "Game not found", 404
     if game.status not in [GameStatus.PENDING, GameStatus.ACTIVE]:
@@ -180,8 +339,10 @@ def cancel_game(user_id, game_id):
     game.status = GameStatus.CANCELLED
     game.outcome = GameOutcome.CANCELLED
     game.end_time = datetime.utcnow()
-    db.session.commit()
     refund_bets(game)
+    db.session.commit()
+    close_game(game)
+    remove_open_game(game.id)
     return game, "Game cancelled and bets refunded", 200
 
 
@@ -202,7 +363,7 @@ def offer_draw(user_id, game_id):
 
 
 def accept_draw(user_id, game_id):
-    game = Game.query.get(game_id)
+    game = locked_game(game_id)
     if not game:
         return None, "Game not found", 404
     if game.status != GameStatus.ACTIVE:
@@ -218,8 +379,11 @@ def accept_draw(user_id, game_id):
     game.outcome = GameOutcome.DRAW
     game.draw_offered_by = None
     game.end_time = datetime.utcnow()
-    db.session.commit()
+    update_ratings(game)
+    record_game_result(game)
     distribute_winnings(game)
+    db.session.commit()
+    close_game(game)
     return game, "Draw accepted", 200
 
 
@@ -241,24 +405,101 @@ def decline_draw(user_id, game_id):
     return game, "Draw declined", 200
 
 
-def get_games(user_id=None, page=1, per_page=20, include_active=False):
+def games_with_players(model=Game):
+    """Game (or ArchivedGame) query that loads both players' usernames in the same SELECT."""
+    return model.query.options(
+        joinedload(model.white_player).load_only(User.username),
+        joinedload(model.black_player).load_only(User.username),
+    )
+
+
+def get_live_games(user_id, moves_format="none"):
+    games = games_with_players().filter(
+        (Game.white_player_id == user_id) | (Game.black_player_id == user_id),
+        Game.status.in_([GameStatus.PENDING, GameStatus.ACTIVE]),
+    )
+    return [game.to_dict(moves_format=moves_format) for game in games]
+
+
+def parse_cursor(cursor):
+    """Parse a ``<created_at ISO>,<game id>`` history cursor."""
+    created_at, game_id = cursor.split(",", 1)
+    return datetime.fromisoformat(created_at), game_id
+
+
+def _newest_first(query, before, limit, model=Game):
+    if before:
+        query = query.filter(tuple_(model.created_at, model.id) < before)
+    return query.order_by(model.created_at.desc(), model.id.desc()).limit(limit)
+
+
+def _history(model, user_id, include_active, before, offset, limit):
+    """Newest-first games from one table; ``offset`` > 0 means OFFSET paging."""
+    if user_id and not offset:
+        sides = [
+            _newest_first(
+                db.session.query(model.id).filter(column == user_id),
+                before,
+                limit,
+                model,
+            ).subquery()
+            for column in (model.white_player_id, model.black_player_id)
+        ]
+        candidates = union_all(*(select(side.c.id) for side in sides))
+        query = games_with_players(model).filter(model.id.in_(candidates))
+    elif user_id:
+        query = games_with_players(model).filter(
+            (model.white_player_id == user_id) | (model.black_player_id == user_id)
+        )
+    elif include_active:
+        query = games_with_players(model)
+    else:
+        query = games_with_players(model).filter(model.status == GameStatus.COMPLETED)
+
+    if offset:
+        # Both tables can hold the page, so each must supply everything up to it
+        return (
+            query.order_by(model.created_at.desc(), model.id.desc())
+            .limit(offset + limit)
+            .all()
+        )
+    return _newest_first(query, before, limit, model).all()
+
+
+def get_games(
+    user_id=None,
+    page=1,
+    per_page=20,
+    include_active=False,
+    moves_format="none",
+    before=None,
+):
+    """Return a user's (or everyone's completed) games, newest first.
+
+    Pages are keyset-paginated on ``(created_at, id)``: pass the cursor of the
+    last game seen as ``before``. A user's history is the union of their white
+    and black games, each walked down its own ``(player_id, created_at)``
+    index, so a deep page costs the same as the first. ``page`` > 1 without a
+    cursor falls back to OFFSET pagination for older clients. Live and
+    archived games are read page by page from both tables and merged.
+    """
     if user_id:
         user = User.query.get(user_id)
         if not user:
             return None, "User not found", 404
-        query = Game.query.filter(
-            (Game.white_player_id == user_id) | (Game.black_player_id == user_id)
-        )
-    else:
-        query = (
-            Game.query
-            if include_active
-            else Game.query.filter(Game.status == GameStatus.COMPLETED)
-        )
 
-    games = (
-        query.order_by(Game.created_at.desc())
-        .paginate(page=page, per_page=per_page, error_out=False)
-        .items
+    offset = (page - 1) * per_page if page > 1 and not before else 0
+    games = heapq.merge(
+        *(
+            _history(model, user_id, include_active, before, offset, per_page)
+            for model in (Game, ArchivedGame)
+        ),
+        key=lambda game: (game.created_at, game.id),
+        reverse=True,
+    )
+    games = list(islice(games, offset, offset + per_page))
+    return (
+        [game.to_dict(moves_format=moves_format) for game in games],
+        "Game history retrieved",
+        200,
     )
-    return [game.to_dict() for game in games], "Game history retrieved", 200
@@ -0,0 +1,183 @@
+# app/services/leaderboard.py
+from bisect import bisect_left, insort
+from threading import Lock
+from sqlalchemy import func
+from app import db
+from app.models.game import TIME_CONTROL_CATEGORIES, time_control_category
+from app.models.archived_game import game_history
+from app.models.user import User
+from app.models.wallet_transaction import WalletTransaction, TransactionType
+from app.utils.money import from_cents
+from app.utils.presence import shared_store
+from app.utils.wallet import game_net_winnings
+
+# Boards are "rating", "winnings" (net cents won on bets) and one
+# "winnings:<category>" per time control. Each is a list of (-score, user_id)
+# kept sorted, plus user_id -> score, so a player's rank is one binary search
+# and a top-N read is a slice; with a message queue configured they are Redis
+# sorted sets instead. They're seeded from the database once and then kept
+# current by the game services as games settle.
+CATEGORIES = TIME_CONTROL_CATEGORIES
+BOARDS = ("rating", "winnings") + tuple(f"winnings:{c}" for c in CATEGORIES)
+
+_boards = {}  # board -> [(-score, user_id)], ascending
+_scores = {}  # board -> {user_id: score}
+_lock = Lock()
+_loaded = False
+SEEDED_KEY = "leaderboard:seeded"
+
+
+def _key(board):
+    return f"leaderboard:{board}"
+
+
+def _set_local(board, user_id, score):
+    entries = _boards.setdefault(board, [])
+    scores = _scores.setdefault(board, {})
+    old = scores.get(user_id)
+    if old is not None:
+        del entries[bisect_left(entries, (-old, user_id))]
+    insort(entries, (-score, user_id))
+    scores[user_id] = score
+
+
+def _apply(sets=(), increments=()):
+    """Write (board, user_id, score) sets and (board, user_id, delta) increments."""
+    shared = shared_store()
+    if shared:
+        pipe = shared.pipeline()
+        for board, user_id, score in sets:
+            pipe.zadd(_key(board), {user_id: score})
+        for board, user_id, delta in increments:
+            pipe.zincrby(_key(board), delta, user_id)
+        pipe.execute()
+        return
+    with _lock:
+        for board, user_id, score in sets:
+            _set_local(board, user_id, score)
+        for board, user_id, delta in increments:
+            _set_local(board, user_id, _scores.get(board, {}).get(user_id, 0) + delta)
+
+
+def _seed():
+    sets = [
+        ("rating", user_id, ranking or 0)
+        for user_id, ranking in db.session.query(User.id, User.ranking)
+    ]
+    winnings = {}
+    games = game_history("id", "base_time", "increment")
+    rows = (
+        db.session.query(
+            WalletTransaction.user_id,
+            games.c.base_time,
+            games.c.increment,
+            func.sum(WalletTransaction.amount),
+        )
+        .join(games, games.c.id == WalletTransaction.game_id)
+        .filter(
+            WalletTransaction.status == "success",
+            WalletTransaction.transaction_type.in_(
+                [TransactionType.BET, TransactionType.WINNINGS, TransactionType.REFUND]
+            ),
+        )
+        .group_by(WalletTransaction.user_id, games.c.base_time, games.c.increment)
+    )
+    for user_id, base_time, increment, amount in rows:
+        for board in ("winnings", f"winnings:{time_control_category(base_time, increment)}"):
+            winnings[(board, user_id)] = winnings.get((board, user_id), 0) + int(amount or 0)
+    sets += [(board, user_id, amount) for (board, user_id), amount in winnings.items()]
+    _apply(sets=sets)
+
+
+def _ensure_loaded():
+    """Seed the boards once per process (or once in Redis); True if seeded now."""
+    global _loaded
+    if _loaded:
+        return False
+    seeded = False
+    shared = shared_store()
+    if not shared or shared.set(SEEDED_KEY, 1, nx=True):
+        _seed()
+        seeded = True
+    _loaded = True
+    return seeded
+
+
+def reset_boards():
+    """Forget every board so the next read reseeds it, e.g. after a recompute."""
+    global _loaded
+    shared = shared_store()
+    if shared:
+        shared.delete(SEEDED_KEY, *[_key(board) for board in BOARDS])
+    with _lock:
+        _boards.clear()
+        _scores.clear()
+    _loaded = False
+
+
+def record_game(game):
+    """Update the boards for a game whose result and payout have committed."""
+    if _ensure_loaded():
+        return  # The seed already counted this game
+    sets = [
+        ("rating", player.id, player.ranking or 0)
+        for player in (game.white_player, game.black_player)
+        if player and game.is_rated
+    ]
+    category = f"winnings:{time_control_category(game.base_time, game.increment)}"
+    increments = [
+        (board, user_id, amount)
+        for user_id, amount in game_net_winnings(game).items()
+        for board in ("winnings", category)
+    ]
+    if sets or increments:
+        _apply(sets, increments)
+
+
+def get_top(board, limit=20, offset=0):
+    """Return [(user_id, score)] for ranks offset+1 .. offset+limit."""
+    _ensure_loaded()
+    shared = shared_store()
+    if shared:
+        rows = shared.zrevrange(_key(board), offset, offset + limit - 1, withscores=True)
+        return [(user_id, int(score)) for user_id, score in rows]
+    with _lock:
+        entries = _boards.get(board, [])[offset:offset + limit]
+    return [(user_id, -score) for score, user_id in entries]
+
+
+def get_rank(board, user_id):
+    """Return (rank, score) for ``user_id``, 1-based, or (None, None)."""
+    _ensure_loaded()
+    shared = shared_store()
+    if shared:
+        pipe = shared.pipeline()
+        pipe.zrevrank(_key(board), user_id)
+        pipe.zscore(_key(board), user_id)
+        rank, score = pipe.execute()
+        if rank is None:
+            return None, None
+        return rank + 1, int(score)
+    with _lock:
+        score = _scores.get(board, {}).get(user_id)
+        if score is None:
+            return None, None
+        return bisect_left(_boards[board], (-score, user_id)) + 1, score
+
+
+def leaderboard_entries(board, rows, start_rank):
+    """Attach usernames to ``rows`` of (user_id, score) with one bounded query."""
+    users = dict(
+        db.session.query(User.id, User.username).filter(
+            User.id.in_([user_id for user_id, _ in rows])
+        )
+    )
+    return [
+        {
+            "rank": start_rank + i,
+            "user_id": user_id,
+            "username": users.get(user_id),
+            "score": score if board == "rating" else from_cents(score),
+        }
+        for i, (user_id, score) in enumerate(rows)
+    ]
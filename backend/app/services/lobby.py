@@ -0,0 +1,129 @@
+# app/services/lobby.py
+import json
+from threading import Lock
+from app import db
+from app.models.game import Game, GameStatus
+from app.models.user import User
+from app.utils.money import from_cents
+from app.utils.presence import shared_store
+
+LOBBY_ROOM = "lobby"
+
+# Only what the lobby renders, fetched in one joined, column-projected query
+LOBBY_COLUMNS = (
+    Game.id,
+    Game.white_player_id,
+    User.username.label("white_player"),
+    User.ranking.label("white_player_ranking"),
+    Game.is_rated,
+    Game.base_time,
+    Game.increment,
+    Game.bet_amount,
+    Game.created_at,
+)
+
+# game_id -> lobby entry for every open game, kept current by the game
+# services so lobby snapshots never scan the games table. Shared through a
+# Redis hash when a message queue is configured.
+_open_games = {}
+_lock = Lock()
+_loaded = False
+_notify = None
+OPEN_GAMES_KEY = "lobby:open"
+
+
+def init_lobby(notify):
+    """Register ``notify(event, data)``, used to push lobby diffs to clients."""
+    global _notify
+    _notify = notify
+
+
+def lobby_game_dict(row):
+    return {
+        "id": row.id,
+        "white_player_id": row.white_player_id,
+        "white_player": row.white_player,
+        "white_player_ranking": row.white_player_ranking,
+        "status": GameStatus.PENDING.value,
+        "is_rated": row.is_rated,
+        "base_time": row.base_time,
+        "increment": row.increment,
+        "bet_amount": from_cents(row.bet_amount),
+        "created_at": row.created_at.isoformat(),
+    }
+
+
+def _query_open_games(limit=None):
+    query = (
+        db.session.query(*LOBBY_COLUMNS)
+        .join(User, User.id == Game.white_player_id)
+        .filter(Game.status == GameStatus.PENDING, Game.black_player_id.is_(None))
+        .order_by(Game.created_at.desc())
+    )
+    if limit:
+        query = query.limit(limit)
+    return [lobby_game_dict(row) for row in query]
+
+
+def _store(entries):
+    shared = shared_store()
+    if shared:
+        if entries:
+            shared.hset(
+                OPEN_GAMES_KEY,
+                mapping={entry["id"]: json.dumps(entry) for entry in entries},
+            )
+        return
+    with _lock:
+        for entry in entries:
+            _open_games[entry["id"]] = entry
+
+
+def _ensure_loaded():
+    global _loaded
+    if _loaded:
+        return
+    _store(_query_open_games())
+    _loaded = True
+
+
+def get_open_games(limit=100):
+    """Newest-first snapshot of open games, served from the in-memory index."""
+    _ensure_loaded()
+    shared = shared_store()
+    if shared:
+        entries = [json.loads(value) for value in shared.hvals(OPEN_GAMES_KEY)]
+    else:
+        with _lock:
+            entries = list(_open_games.values())
+    entries.sort(key=lambda entry: entry["created_at"], reverse=True)
+    return entries[:limit]
+
+
+def add_open_game(game, user):
+    entry = {
+        "id": game.id,
+        "white_player_id": game.white_player_id,
+        "white_player": user.username,
+        "white_player_ranking": user.ranking,
+        "status": GameStatus.PENDING.value,
+        "is_rated": game.is_rated,
+        "base_time": game.base_time,
+        "increment": game.increment,
+        "bet_amount": from_cents(game.bet_amount),
+        "created_at": game.created_at.isoformat(),
+    }
+    _store([entry])
+    if _notify:
+        _notify("open_game_added", entry)
+
+
+def remove_open_game(game_id):
+    shared = shared_store()
+    if shared:
+        removed = shared.hdel(OPEN_GAMES_KEY, game_id)
+    else:
+        with _lock:
+            removed = _open_games.pop(game_id, None) is not None
+    if removed and _notify:
+        _notify("open_game_removed", {"id": game_id})
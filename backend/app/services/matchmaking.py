@@ -0,0 +1,270 @@
+# app/services/matchmaking.py
+import time
+from bisect import bisect_left, insort
+from itertools import count
+from threading import Lock
+from app.models.user import User
+from app.services.game import create_paired_match
+from app.utils.presence import shared_store
+from config import Config
+
+# Open seeks bucketed by (base_time, increment, bet_amount, is_rated); each
+# bucket is a list of (rating, seq, user_id) kept sorted by rating so the
+# closest opponent is found with a binary search instead of a table scan.
+# With a message queue configured the seek book lives in Redis instead (one
+# sorted set per bucket, scored by rating), so seekers on different workers
+# pair with each other and any worker can answer GET /game/seek.
+# REST seeks expire unless GET /game/seek is polled within
+# MATCHMAKING_SEEK_TTL; socket seeks last until the socket disconnects.
+_buckets = {}
+_seeks = {}  # user_id -> (bucket key, entry, expires at or None)
+_matches = {}  # user_id -> game_id, for REST seekers to pick up
+_seq = count()
+_lock = Lock()
+
+SEEKS_KEY = "matchmaking:seeks"  # Hash: user_id -> bucket zset key
+EXPIRY_KEY = "matchmaking:seek_expiry"  # Hash: user_id -> unix time, REST seeks only
+MATCH_TTL = 10 * 60  # Seconds a match waits for a REST seeker to pick it up
+
+# Claim the closest live seek within the window, or queue the caller,
+# atomically, so two workers can't both miss each other and queue side by
+# side. Expired seeks met on the way are dropped.
+# KEYS: bucket zset, seeks hash, expiry hash.
+# ARGV: user_id, rating, window, now, caller's expiry ('' for none).
+PAIR_SCRIPT = """
+local rating, window, now = tonumber(ARGV[2]), tonumber(ARGV[3]), tonumber(ARGV[4])
+while true do
+    local below = redis.call('ZREVRANGEBYSCORE', KEYS[1], rating, rating - window, 'WITHSCORES', 'LIMIT', 0, 1)
+    local above = redis.call('ZRANGEBYSCORE', KEYS[1], rating, rating + window, 'WITHSCORES', 'LIMIT', 0, 1)
+    local best = below
+    if #above > 0 and (#below == 0 or tonumber(above[2]) - rating < rating - tonumber(below[2])) then
+        best = above
+    end
+    if #best == 0 then
+        break
+    end
+    local expires = redis.call('HGET', KEYS[3], best[1])
+    redis.call('ZREM', KEYS[1], best[1])
+    redis.call('HDEL', KEYS[2], best[1])
+    redis.call('HDEL', KEYS[3], best[1])
+    if not expires then
+        return {best[1], best[2], ''}
+    end
+    if tonumber(expires) >= now then
+        return {best[1], best[2], expires}
+    end
+end
+redis.call('ZADD', KEYS[1], rating, ARGV[1])
+redis.call('HSET', KEYS[2], ARGV[1], KEYS[1])
+if ARGV[5] == '' then
+    redis.call('HDEL', KEYS[3], ARGV[1])
+else
+    redis.call('HSET', KEYS[3], ARGV[1], ARGV[5])
+end
+return false
+"""
+_pair_script = None
+
+
+def _bucket_key(key):
+    base_time, increment, bet_amount, is_rated = key
+    return f"matchmaking:bucket:{base_time}:{increment}:{bet_amount}:{int(bool(is_rated))}"
+
+
+def _match_key(user_id):
+    return f"matchmaking:match:{user_id}"
+
+
+def _expires_at(ttl):
+    return time.time() + ttl if ttl else None
+
+
+def _expired(expires, now):
+    return expires is not None and float(expires) < now
+
+
+def _add(user_id, key, rating, expires):
+    entry = (rating, next(_seq), user_id)
+    insort(_buckets.setdefault(key, []), entry)
+    _seeks[user_id] = (key, entry, expires)
+
+
+def _remove(user_id):
+    key, entry, _ = _seeks.pop(user_id)
+    bucket = _buckets[key]
+    del bucket[bisect_left(bucket, entry)]
+    if not bucket:
+        del _buckets[key]
+
+
+def _closest(bucket, rating, window, now):
+    """Closest live seek within ``window``; expired ones met are dropped."""
+    while True:
+        i = bisect_left(bucket, (rating,))
+        candidates = [bucket[j] for j in (i - 1, i) if 0 <= j < len(bucket)]
+        candidates = [c for c in candidates if abs(c[0] - rating) <= window]
+        best = min(candidates, key=lambda c: abs(c[0] - rating), default=None)
+        if best is None or not _expired(_seeks[best[2]][2], now):
+            return best
+        _remove(best[2])
+
+
+def _queue(user_id, key, rating, expires):
+    shared = shared_store()
+    if shared:
+        bucket = _bucket_key(key)
+        pipe = shared.pipeline()
+        pipe.zadd(bucket, {user_id: rating})
+        pipe.hset(SEEKS_KEY, user_id, bucket)
+        if expires is None:
+            pipe.hdel(EXPIRY_KEY, user_id)
+        else:
+            pipe.hset(EXPIRY_KEY, user_id, expires)
+        pipe.execute()
+        return
+    with _lock:
+        _add(user_id, key, rating, expires)
+
+
+def _cancel(user_id):
+    """Drop ``user_id``'s open seek and any unclaimed match; True if one was open."""
+    shared = shared_store()
+    if shared:
+        bucket = shared.hget(SEEKS_KEY, user_id)
+        pipe = shared.pipeline()
+        pipe.delete(_match_key(user_id))
+        pipe.hdel(EXPIRY_KEY, user_id)
+        if bucket:
+            pipe.zrem(bucket, user_id)
+            pipe.hdel(SEEKS_KEY, user_id)
+        pipe.execute()
+        return bool(bucket)
+    with _lock:
+        _matches.pop(user_id, None)
+        if user_id not in _seeks:
+            return False
+        _remove(user_id)
+    return True
+
+
+def _pair_or_queue(user_id, key, rating, ttl):
+    """Claim the closest open seek as ``(opponent_id, rating, expires)``, or queue and return None."""
+    _cancel(user_id)
+    window = Config.MATCHMAKING_RATING_WINDOW
+    now = time.time()
+    expires = _expires_at(ttl)
+    shared = shared_store()
+    if shared:
+        global _pair_script
+        if _pair_script is None:
+            _pair_script = shared.register_script(PAIR_SCRIPT)
+        opponent = _pair_script(
+            keys=[_bucket_key(key), SEEKS_KEY, EXPIRY_KEY],
+            args=[user_id, rating, window, now, "" if expires is None else expires],
+        )
+        if not opponent:
+            return None
+        return opponent[0], int(float(opponent[1])), float(opponent[2]) if opponent[2] else None
+    with _lock:
+        opponent = _closest(_buckets.get(key, []), rating, window, now)
+        if opponent is None:
+            _add(user_id, key, rating, expires)
+            return None
+        opponent_expires = _seeks[opponent[2]][2]
+        _remove(opponent[2])
+    return opponent[2], opponent[0], opponent_expires
+
+
+def _record_match(game_id, *user_ids):
+    shared = shared_store()
+    if shared:
+        pipe = shared.pipeline()
+        for user_id in user_ids:
+            pipe.set(_match_key(user_id), game_id, ex=MATCH_TTL)
+        pipe.execute()
+        return
+    with _lock:
+        for user_id in user_ids:
+            _matches[user_id] = game_id
+
+
+def seek(user_id, base_time=300, increment=0, bet_amount=0, is_rated=True, ttl=None):
+    """Pair ``user_id`` with the closest-rated open seek, or queue a new one.
+
+    Returns ``(game, message, status)`` like the game services: a game when a
+    match was made, otherwise None with status 202 while the seek waits. A
+    queued seek with a ``ttl`` (seconds) is dropped unless seek_status
+    refreshes it in time; without one it lasts until cancelled.
+    """
+    user = User.query.get(user_id)
+    if not user:
+        return None, "User not found", 404
+    if base_time <= 0 or increment < 0:
+        return None, "Invalid time controls", 400
+    if bet_amount < 0:
+        return None, "Bet amount cannot be negative", 400
+    if bet_amount > 0 and user.wallet_balance < bet_amount:
+        return None, "Insufficient balance to fund bet", 400
+
+    key = (base_time, increment, bet_amount, is_rated)
+    rating = user.ranking or 0
+    opponent = _pair_or_queue(user_id, key, rating, ttl)
+    if opponent is None:
+        return None, "Seeking opponent", 202
+
+    # The waiting seeker takes white; the newcomer black. Both are seated
+    # and debited together, so the game never passes through the lobby
+    opponent_id, opponent_rating, opponent_expires = opponent
+    game, message, status = create_paired_match(
+        opponent_id, user_id, is_rated, base_time, increment, bet_amount
+    )
+    if not game:
+        # Someone can no longer fund the stake; whoever still can keeps seeking
+        if status != 400:
+            return None, message, status
+        if User.query.get(opponent_id).wallet_balance >= bet_amount:
+            _queue(opponent_id, key, opponent_rating, opponent_expires)
+        if User.query.get(user_id).wallet_balance < bet_amount:
+            return None, message, status
+        _queue(user_id, key, rating, _expires_at(ttl))
+        return None, "Seeking opponent", 202
+    _record_match(game.id, opponent_id, user_id)
+    return game, "Match found", 201
+
+
+def cancel_seek(user_id):
+    return _cancel(user_id)
+
+
+def seek_status(user_id, ttl=None):
+    """Return ``(game_id, seeking)`` for REST clients polling their seek.
+
+    Polling keeps an expiring seek alive for another ``ttl`` seconds; one
+    that has already expired is dropped.
+    """
+    now = time.time()
+    shared = shared_store()
+    if shared:
+        pipe = shared.pipeline()
+        pipe.get(_match_key(user_id))
+        pipe.delete(_match_key(user_id))
+        pipe.hexists(SEEKS_KEY, user_id)
+        pipe.hget(EXPIRY_KEY, user_id)
+        game_id, _, seeking, expires = pipe.execute()
+        if seeking and _expired(expires, now):
+            _cancel(user_id)
+            return game_id, False
+        if seeking and expires is not None and ttl:
+            shared.hset(EXPIRY_KEY, user_id, now + ttl)
+        return game_id, bool(seeking)
+    with _lock:
+        game_id = _matches.pop(user_id, None)
+        if user_id not in _seeks:
+            return game_id, False
+        key, entry, expires = _seeks[user_id]
+        if _expired(expires, now):
+            _remove(user_id)
+            return game_id, False
+        if expires is not None and ttl:
+            _seeks[user_id] = (key, entry, now + ttl)
+        return game_id, True
@@ -0,0 +1,138 @@
+# app/services/pgn.py
+from sqlalchemy import literal, select, union_all
+from sqlalchemy.orm import aliased
+from app import db
+from app.models.game import Game, GameStatus, GameOutcome
+from app.models.archived_game import ArchivedGame, decompress_moves
+from app.models.user import User
+from app.utils.move_codec import to_san
+
+RESULTS = {
+    GameOutcome.WHITE_WIN: "1-0",
+    GameOutcome.BLACK_WIN: "0-1",
+    GameOutcome.DRAW: "1/2-1/2",
+}
+LINE_LENGTH = 80  # PGN export format caps movetext lines at 80 characters
+FLUSH_BYTES = 16 * 1024
+
+White = aliased(User)
+Black = aliased(User)
+
+
+def _export_columns(model, moves, moves_packed):
+    # Only what a PGN needs, so rows stream without building ORM objects
+    return (
+        model.id,
+        model.is_rated,
+        model.outcome,
+        model.base_time,
+        model.increment,
+        model.start_time,
+        model.created_at,
+        moves.label("moves"),
+        moves_packed.label("moves_packed"),
+        literal(model is ArchivedGame).label("compressed"),
+        White.username.label("white"),
+        Black.username.label("black"),
+    )
+
+
+def _tag(name, value):
+    value = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'[{name} "{value}"]\n'
+
+
+def _movetext(san_moves, result):
+    tokens = []
+    for ply, san in enumerate(san_moves):
+        if ply % 2 == 0:
+            tokens.append(f"{ply // 2 + 1}.")
+        tokens.append(san)
+    tokens.append(result)
+    lines, line = [], ""
+    for token in tokens:
+        if line and len(line) + 1 + len(token) > LINE_LENGTH:
+            lines.append(line)
+            line = token
+        else:
+            line = f"{line} {token}" if line else token
+    lines.append(line)
+    return "\n".join(lines) + "\n"
+
+
+def game_pgn(row):
+    """Render one export row (see export_query) as a PGN game."""
+    result = RESULTS.get(row.outcome, "*")
+    started = row.start_time or row.created_at
+    if row.compressed:
+        san_moves = to_san(decompress_moves(row.moves_packed))
+    elif row.moves_packed is not None:
+        san_moves = to_san(row.moves_packed)
+    else:
+        san_moves = row.moves.split() if row.moves else []
+    return (
+        _tag("Event", "Rated game" if row.is_rated else "Casual game")
+        + _tag("Site", "ChessEarn")
+        + _tag("Date", started.strftime("%Y.%m.%d") if started else "????.??.??")
+        + _tag("Round", "-")
+        + _tag("White", row.white or "?")
+        + _tag("Black", row.black or "?")
+        + _tag("Result", result)
+        + (_tag("UTCDate", started.strftime("%Y.%m.%d")) if started else "")
+        + (_tag("UTCTime", started.strftime("%H:%M:%S")) if started else "")
+        + _tag("TimeControl", f"{row.base_time}+{row.increment}")
+        + _tag("GameId", row.id)
+        + "\n"
+        + _movetext(san_moves, result)
+        + "\n"
+    )
+
+
+def _completed_games(model, moves, moves_packed, user_id):
+    sides = [
+        select(model.id).where(column == user_id, model.status == GameStatus.COMPLETED)
+        for column in (model.white_player_id, model.black_player_id)
+    ]
+    return (
+        select(*_export_columns(model, moves, moves_packed))
+        .join(White, White.id == model.white_player_id)
+        .outerjoin(Black, Black.id == model.black_player_id)
+        .where(model.id.in_(union_all(*sides)))
+    )
+
+
+def export_query(user_id):
+    """A user's completed games, live and archived, oldest first.
+
+    Rows carry the columns game_pgn reads; archived rows have their
+    compressed moves in ``moves_packed`` and ``compressed`` set.
+    """
+    games = union_all(
+        _completed_games(Game, Game.moves, Game.moves_packed, user_id),
+        _completed_games(
+            ArchivedGame, literal(""), ArchivedGame.moves_z, user_id
+        ),
+    ).subquery()
+    return select(games).order_by(games.c.created_at, games.c.id)
+
+
+def export_pgn(user_id, chunk_size=500):
+    """Yield ``user_id``'s completed games as PGN text, a few KB at a time.
+
+    Rows come off a server-side cursor ``chunk_size`` at a time, so memory
+    stays flat however long the history is, and the first games are sent
+    before the rest have been read.
+    """
+    rows = db.session.execute(
+        export_query(user_id).execution_options(yield_per=chunk_size)
+    )
+    buffer, size = [], 0
+    for row in rows:
+        text = game_pgn(row)
+        buffer.append(text)
+        size += len(text)
+        if size >= FLUSH_BYTES:
+            yield "".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer)
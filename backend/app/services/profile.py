@@ -1,4 +1,5 @@
 from app.models.user import User
+from app.models.user_stats import UserStats
 from app.utils.file_handler import save_profile_photo
 from app import db
 from flask_jwt_extended import get_jwt_identity
@@ -12,6 +13,11 @@ def get_profile():
     return user, None, 200
 
 
+def get_user_stats(user_id):
+    """The player's running totals: one primary-key read, zeros if none yet."""
+    return db.session.get(UserStats, user_id) or UserStats(user_id=user_id)
+
+
 def update_profile_photo(file):
     user_id = get_jwt_identity()
     user = User.query.get(user_id)
@@ -0,0 +1,128 @@
+# app/services/rating.py
+from sqlalchemy import update
+from app import db
+from app.models.game import GameStatus, GameOutcome
+from app.models.archived_game import game_history
+from app.models.user import User
+from config import Config
+
+# Elo. Ratings are stored as integers and rounded after every game, and the
+# bulk replay below performs exactly the same float64 arithmetic, so replaying
+# history reproduces the ratings the incremental path wrote.
+SCORES = {
+    GameOutcome.WHITE_WIN: 1.0,
+    GameOutcome.BLACK_WIN: 0.0,
+    GameOutcome.DRAW: 0.5,
+}
+
+
+def expected_score(rating, opponent_rating):
+    return 1.0 / (1.0 + 10.0 ** ((opponent_rating - rating) / 400.0))
+
+
+def rate_game(white_rating, black_rating, score):
+    """Return the new (white, black) ratings after white scored ``score``."""
+    delta = Config.RATING_K_FACTOR * (score - expected_score(white_rating, black_rating))
+    return round(white_rating + delta), round(black_rating - delta)
+
+
+def update_ratings(game):
+    """Stage both players' new ratings for a finished game; the caller commits.
+
+    The two user rows are locked in id order, the same order ``refund_bets``
+    uses, so this must run before the game's payout to keep lock order.
+    """
+    score = SCORES.get(game.outcome)
+    if not game.is_rated or score is None or not game.black_player_id:
+        return
+    players = (
+        User.query.filter(User.id.in_([game.white_player_id, game.black_player_id]))
+        .order_by(User.id)
+        .with_for_update()
+        .populate_existing()
+        .all()
+    )
+    by_id = {player.id: player for player in players}
+    white, black = by_id[game.white_player_id], by_id[game.black_player_id]
+    white.ranking, black.ranking = rate_game(
+        _rating(white.ranking), _rating(black.ranking), score
+    )
+
+
+def _rating(value):
+    return Config.RATING_INITIAL if value is None else value
+
+
+def _conflict_free_rounds(white, black):
+    """Split a chunk of games into rounds in which no player appears twice.
+
+    A game goes in the round after the latest one holding either player, so
+    each player's games stay in chronological order and every round can be
+    rated as one vectorized step.
+    """
+    next_round = {}
+    rounds = []
+    for w, b in zip(white.tolist(), black.tolist()):
+        r = max(next_round.get(w, 0), next_round.get(b, 0))
+        next_round[w] = next_round[b] = r + 1
+        rounds.append(r)
+    return rounds
+
+
+def recompute_ratings(chunk_size=50000):
+    """Rebuild every rating by replaying all rated games oldest first.
+
+    Games are streamed from the database ``chunk_size`` at a time and rated
+    in NumPy batches; every user starts from RATING_INITIAL. Returns
+    (users, games) counts. Games finishing while this runs are overwritten,
+    so run it while play is paused.
+    """
+    import numpy as np
+
+    user_ids = db.session.execute(db.select(User.id).order_by(User.id)).scalars().all()
+    index = {user_id: i for i, user_id in enumerate(user_ids)}
+    ratings = np.full(len(user_ids), float(Config.RATING_INITIAL))
+    k = float(Config.RATING_K_FACTOR)
+
+    history = game_history(
+        "id", "white_player_id", "black_player_id", "status", "outcome", "is_rated", "end_time"
+    )
+    games = db.session.execute(
+        db.select(history.c.white_player_id, history.c.black_player_id, history.c.outcome)
+        .where(
+            history.c.status == GameStatus.COMPLETED,
+            history.c.is_rated.is_(True),
+            history.c.outcome.in_(list(SCORES)),
+            history.c.black_player_id.isnot(None),
+        )
+        .order_by(history.c.end_time, history.c.id)
+        .execution_options(yield_per=chunk_size)
+    )
+    total = 0
+    for chunk in games.partitions():
+        white = np.fromiter((index[row[0]] for row in chunk), dtype=np.int64, count=len(chunk))
+        black = np.fromiter((index[row[1]] for row in chunk), dtype=np.int64, count=len(chunk))
+        score = np.fromiter((SCORES[row[2]] for row in chunk), dtype=np.float64, count=len(chunk))
+        rounds = np.array(_conflict_free_rounds(white, black))
+        order = np.argsort(rounds, kind="stable")
+        bounds = np.flatnonzero(np.diff(rounds[order])) + 1
+        for batch in np.split(order, bounds):
+            w, b = white[batch], black[batch]
+            expected = 1.0 / (1.0 + 10.0 ** ((ratings[b] - ratings[w]) / 400.0))
+            delta = k * (score[batch] - expected)
+            ratings[w], ratings[b] = np.rint(ratings[w] + delta), np.rint(ratings[b] - delta)
+        total += len(chunk)
+
+    for start in range(0, len(user_ids), chunk_size):
+        db.session.execute(
+            update(User),
+            [
+                {"id": user_id, "ranking": int(rating)}
+                for user_id, rating in zip(
+                    user_ids[start:start + chunk_size],
+                    ratings[start:start + chunk_size].tolist(),
+                )
+            ],
+        )
+    db.session.commit()
+    return len(user_ids), total
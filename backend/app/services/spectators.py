@@ -0,0 +1,99 @@
+# app/services/spectators.py
+from threading import Lock
+from app.utils.board_cache import get_board
+from config import Config
+
+# Spectators watch a game from their own room, separate from the players'.
+# Moves are queued per game and flushed to that room as one batched "moves"
+# event every SPECTATOR_BROADCAST_INTERVAL seconds, and joining spectators are
+# served a shared snapshot that is patched with each move instead of being
+# rebuilt (and the game's moves re-decoded) for every watcher.
+_snapshots = {}  # game_id -> game dict + fen, as of snapshot["ply"]
+_pending = {}  # game_id -> [move events not yet sent to spectators]
+_lock = Lock()
+_socketio = None
+
+
+def watch_room(game_id):
+    return f"watch:{game_id}"
+
+
+def get_snapshot(game):
+    """Return the shared spectator snapshot for ``game``, building it if stale."""
+    with _lock:
+        snapshot = _snapshots.get(game.id)
+        if snapshot and snapshot["ply"] == game.ply:
+            return snapshot
+    snapshot = game.to_dict()
+    snapshot["fen"] = game.current_fen or get_board(game).fen()
+    with _lock:
+        _snapshots[game.id] = snapshot
+    return snapshot
+
+
+def queue_move(event):
+    """Patch the snapshot with a ``move`` event and queue it for spectators."""
+    game_id = event["game_id"]
+    with _lock:
+        snapshot = _snapshots.get(game_id)
+        if snapshot and snapshot["ply"] == event["seq"] - 1:
+            moves = snapshot.get("moves")
+            _snapshots[game_id] = {
+                **snapshot,
+                "ply": event["seq"],
+                "fen": event["fen"],
+                "current_fen": event["fen"],
+                "moves": f"{moves} {event['san']}" if moves else event["san"],
+                "white_time_remaining": event["white_time_remaining"],
+                "black_time_remaining": event["black_time_remaining"],
+                "last_move_at": event["last_move_at"],
+            }
+        elif snapshot:
+            del _snapshots[game_id]
+        if Config.SPECTATOR_BROADCAST_INTERVAL > 0:
+            _pending.setdefault(game_id, []).append(event)
+            return
+    _socketio.emit("moves", {"game_id": game_id, "moves": [event]}, room=watch_room(game_id))
+
+
+def flush(game_id=None):
+    """Send queued moves now: for one game, or for every game if None."""
+    with _lock:
+        if game_id is None:
+            batches = list(_pending.items())
+            _pending.clear()
+        else:
+            batches = [(game_id, _pending.pop(game_id, []))]
+    for batch_game_id, events in batches:
+        if events:
+            _socketio.emit(
+                "moves",
+                {"game_id": batch_game_id, "moves": events},
+                room=watch_room(batch_game_id),
+            )
+
+
+def invalidate(game_id):
+    """Drop the snapshot after a change that isn't a move (e.g. a draw offer)."""
+    with _lock:
+        _snapshots.pop(game_id, None)
+
+
+def end_game(game_id):
+    """Flush what spectators haven't seen yet and drop the game's snapshot."""
+    flush(game_id)
+    invalidate(game_id)
+
+
+def init_spectators(socketio):
+    global _socketio
+    _socketio = socketio
+    if Config.SPECTATOR_BROADCAST_INTERVAL <= 0:
+        return
+
+    def run():
+        while True:
+            socketio.sleep(Config.SPECTATOR_BROADCAST_INTERVAL)
+            flush()
+
+    socketio.start_background_task(run)
@@ -0,0 +1,74 @@
+# app/utils/active_games.py
+from threading import Lock
+from app.models.game import Game, GameStatus
+from app.utils.presence import shared_store
+
+# user_id -> ids of that user's pending/active games, so a socket can join its
+# game rooms on connect without querying the games table. Shared through
+# Redis alongside the presence index when a message queue is configured.
+_games = {}
+_lock = Lock()
+_loaded = False
+
+
+def _key(user_id):
+    return f"games:user:{user_id}"
+
+
+def _players(game):
+    return [pid for pid in (game.white_player_id, game.black_player_id) if pid]
+
+
+def _add(pairs):
+    shared = shared_store()
+    if shared:
+        pipe = shared.pipeline()
+        for user_id, game_id in pairs:
+            pipe.sadd(_key(user_id), game_id)
+        pipe.execute()
+        return
+    with _lock:
+        for user_id, game_id in pairs:
+            _games.setdefault(user_id, set()).add(game_id)
+
+
+def _ensure_loaded():
+    """Seed the index from the database once per process."""
+    global _loaded
+    if _loaded:
+        return
+    games = Game.query.with_entities(
+        Game.id, Game.white_player_id, Game.black_player_id
+    ).filter(Game.status.in_([GameStatus.PENDING, GameStatus.ACTIVE]))
+    _add([(pid, game.id) for game in games for pid in _players(game)])
+    _loaded = True
+
+
+def track_game(game):
+    _add([(pid, game.id) for pid in _players(game)])
+
+
+def untrack_game(game):
+    shared = shared_store()
+    if shared:
+        pipe = shared.pipeline()
+        for pid in _players(game):
+            pipe.srem(_key(pid), game.id)
+        pipe.execute()
+        return
+    with _lock:
+        for pid in _players(game):
+            game_ids = _games.get(pid)
+            if game_ids:
+                game_ids.discard(game.id)
+                if not game_ids:
+                    del _games[pid]
+
+
+def active_game_ids(user_id):
+    _ensure_loaded()
+    shared = shared_store()
+    if shared:
+        return set(shared.smembers(_key(user_id)))
+    with _lock:
+        return set(_games.get(user_id, ()))
@@ -0,0 +1,65 @@
+# app/utils/board_cache.py
+from collections import OrderedDict
+from threading import Lock
+import chess
+from app.utils.move_codec import decode_moves
+from config import Config
+
+# Per-process cache of live boards keyed by game id: {game_id: (ply, chess.Board)}
+_boards = OrderedDict()
+_lock = Lock()
+
+# A FEN carries no move stack, so python-chess can't see repetitions on a
+# board built from one. Fivefold repetition needs at least 16 plies without a
+# capture or pawn move (four round trips back to the position), so a snapshot
+# that can't reach that with the next move can't be in one; anything longer
+# is rebuilt by replaying the game so is_game_over() still sees the history.
+REPETITION_PLIES = 16
+
+
+def _board_from_snapshot(game):
+    if game.current_fen:
+        board = chess.Board(game.current_fen)
+        if board.halfmove_clock + 1 < REPETITION_PLIES:
+            return game.ply or 0, board
+    return 0, chess.Board()
+
+
+def get_board(game):
+    """Return the live board for ``game`` without replaying the whole game.
+
+    The cached entry is versioned by ``Game.ply``. A cold read starts from the
+    ``current_fen`` snapshot (or replays the game, when the position may be a
+    repetition, see REPETITION_PLIES); a cache that is behind the row pushes only the
+    missing moves, and one that is ahead (e.g. a move whose commit was rolled
+    back) is rebuilt from the snapshot.
+    """
+    target_ply = game.ply or 0
+    with _lock:
+        entry = _boards.get(game.id)
+        if entry is not None:
+            _boards.move_to_end(game.id)
+    if entry is None or entry[0] > target_ply:
+        entry = _board_from_snapshot(game)
+    ply, board = entry
+    if ply < target_ply and game.moves_packed is not None:
+        for move in decode_moves(game.moves_packed, ply, target_ply):
+            board.push(move)
+    elif ply < target_ply:
+        for move in game.moves.split()[ply:target_ply]:
+            board.push_san(move)
+    set_board(game.id, target_ply, board)
+    return board
+
+
+def set_board(game_id, ply, board):
+    with _lock:
+        _boards[game_id] = (ply, board)
+        _boards.move_to_end(game_id)
+        while len(_boards) > Config.BOARD_CACHE_SIZE:
+            _boards.popitem(last=False)
+
+
+def evict_board(game_id):
+    with _lock:
+        _boards.pop(game_id, None)
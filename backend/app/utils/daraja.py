@@ -0,0 +1,111 @@
+# app/utils/daraja.py
+import base64
+import time
+from threading import Lock
+import requests
+from requests.adapters import HTTPAdapter
+from config import Config
+
+
+class DarajaClient:
+    """Thin client for the Safaricom Daraja API.
+
+    Holds one keep-alive ``requests.Session`` with a bounded connection pool,
+    applies a timeout to every call, and caches the OAuth token until shortly
+    before it expires. Concurrent callers that find the token stale wait on a
+    single refresh instead of each requesting their own.
+    """
+
+    def __init__(
+        self,
+        base_url,
+        consumer_key,
+        consumer_secret,
+        timeout=(3.05, 15),
+        pool_size=10,
+        token_margin=60,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.consumer_key = consumer_key
+        self.consumer_secret = consumer_secret
+        self.timeout = timeout
+        self.token_margin = token_margin
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._token = None
+        self._token_expires_at = 0
+        self._token_lock = Lock()
+
+    @classmethod
+    def from_config(cls):
+        return cls(
+            Config.MPESA_API_URL,
+            Config.MPESA_CONSUMER_KEY,
+            Config.MPESA_CONSUMER_SECRET,
+            timeout=(Config.MPESA_CONNECT_TIMEOUT, Config.MPESA_READ_TIMEOUT),
+            pool_size=Config.MPESA_POOL_SIZE,
+        )
+
+    def _token_valid(self):
+        return self._token and time.monotonic() < self._token_expires_at
+
+    def access_token(self):
+        """Return a cached OAuth token; raises ``requests.RequestException``."""
+        if self._token_valid():
+            return self._token
+        with self._token_lock:
+            # Whoever held the lock before us may already have refreshed it
+            if self._token_valid():
+                return self._token
+            auth = base64.b64encode(
+                f"{self.consumer_key}:{self.consumer_secret}".encode()
+            ).decode()
+            response = self.session.get(
+                f"{self.base_url}/oauth/v1/generate",
+                params={"grant_type": "client_credentials"},
+                headers={"Authorization": f"Basic {auth}"},
+                timeout=self.timeout,
+            )
+            response.raise_for_status()
+            data = response.json()
+            expires_in = int(data.get("expires_in", 3599))
+            self._token = data.get("access_token")
+            self._token_expires_at = (
+                time.monotonic() + max(expires_in - self.token_margin, 0)
+            )
+            return self._token
+
+    def invalidate_token(self):
+        with self._token_lock:
+            self._token = None
+            self._token_expires_at = 0
+
+    def post(self, path, payload):
+        """POST ``payload`` with a bearer token, refreshing it once on a 401."""
+        for attempt in range(2):
+            response = self.session.post(
+                f"{self.base_url}{path}",
+                json=payload,
+                headers={"Authorization": f"Bearer {self.access_token()}"},
+                timeout=self.timeout,
+            )
+            if response.status_code == 401 and attempt == 0:
+                self.invalidate_token()
+                continue
+            response.raise_for_status()
+            return response.json()
+
+
+_client = None
+_client_lock = Lock()
+
+
+def get_daraja_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = DarajaClient.from_config()
+    return _client
@@ -0,0 +1,35 @@
+# app/utils/money.py
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+# Money is stored as integer cents everywhere; these helpers are the only
+# place amounts cross between API units (shillings) and storage units.
+CENTS = 100
+
+
+def to_cents(amount):
+    """Parse an API amount in shillings (number or numeric string) into cents."""
+    if isinstance(amount, bool):
+        raise ValueError("Invalid amount")
+    try:
+        value = Decimal(str(amount))
+    except (InvalidOperation, ValueError):
+        raise ValueError("Invalid amount")
+    if not value.is_finite():
+        raise ValueError("Invalid amount")
+    return int((value * CENTS).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+
+
+def from_cents(cents):
+    """Serialize stored cents back to shillings for JSON responses."""
+    if cents is None:
+        return None
+    return cents / CENTS
+
+
+def apply_rate(cents, rate):
+    """Return ``rate`` (e.g. a 0.2 platform fee) of ``cents``, rounded half up."""
+    return int(
+        (Decimal(cents) * Decimal(str(rate))).quantize(
+            Decimal("1"), rounding=ROUND_HALF_UP
+        )
+    )
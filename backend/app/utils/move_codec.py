@@ -0,0 +1,57 @@
+# app/utils/move_codec.py
+import chess
+
+# Each move packs into 16 bits: from square (6) | to square (6) | promotion (3)
+MOVE_SIZE = 2
+
+
+def encode_move(move):
+    value = move.from_square | (move.to_square << 6) | ((move.promotion or 0) << 12)
+    return value.to_bytes(MOVE_SIZE, "big")
+
+
+def encode_moves(moves):
+    return b"".join(encode_move(move) for move in moves)
+
+
+def decode_move(data):
+    value = int.from_bytes(data, "big")
+    return chess.Move(value & 0x3F, (value >> 6) & 0x3F, (value >> 12) & 0x7 or None)
+
+
+def decode_moves(blob, start=0, stop=None):
+    """Decode plies ``start``..``stop`` of a packed move blob into ``chess.Move``s."""
+    blob = bytes(blob or b"")
+    size = len(blob) // MOVE_SIZE
+    stop = size if stop is None else min(stop, size)
+    return [
+        decode_move(blob[i * MOVE_SIZE : (i + 1) * MOVE_SIZE])
+        for i in range(start, stop)
+    ]
+
+
+def ply_count(blob):
+    return len(blob or b"") // MOVE_SIZE
+
+
+def pack_san(san_moves):
+    board = chess.Board()
+    packed = bytearray()
+    for san in san_moves:
+        move = board.parse_san(san)
+        packed += encode_move(move)
+        board.push(move)
+    return bytes(packed)
+
+
+def to_uci(blob):
+    return [move.uci() for move in decode_moves(blob)]
+
+
+def to_san(blob):
+    board = chess.Board()
+    san_moves = []
+    for move in decode_moves(blob):
+        san_moves.append(board.san(move))
+        board.push(move)
+    return san_moves
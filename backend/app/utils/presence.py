@@ -0,0 +1,70 @@
+# app/utils/presence.py
+from threading import Lock
+from config import Config
+
+# Which user owns which socket. A sid only ever talks to the worker that holds
+# it (sticky sessions), so sid -> user is answered from this process. The
+# user -> sids index is shared through Redis when a message queue is
+# configured, so any worker can find a player's sockets on other workers.
+_sid_users = {}
+_user_sids = {}
+_lock = Lock()
+_redis = None
+
+SID_TTL = 24 * 60 * 60  # Drop sockets orphaned by a crashed worker after a day
+
+
+def shared_store():
+    global _redis
+    if _redis is None and Config.SOCKETIO_MESSAGE_QUEUE:
+        import redis
+
+        _redis = redis.Redis.from_url(
+            Config.SOCKETIO_MESSAGE_QUEUE, decode_responses=True
+        )
+    return _redis
+
+
+def _user_key(user_id):
+    return f"presence:user:{user_id}"
+
+
+def add_connection(sid, user_id):
+    with _lock:
+        _sid_users[sid] = user_id
+        _user_sids.setdefault(user_id, set()).add(sid)
+    shared = shared_store()
+    if shared:
+        pipe = shared.pipeline()
+        pipe.sadd(_user_key(user_id), sid)
+        pipe.expire(_user_key(user_id), SID_TTL)
+        pipe.execute()
+
+
+def remove_connection(sid):
+    """Forget ``sid`` and return the user it belonged to, if any."""
+    with _lock:
+        user_id = _sid_users.pop(sid, None)
+        if user_id is None:
+            return None
+        sids = _user_sids.get(user_id, set())
+        sids.discard(sid)
+        if not sids:
+            _user_sids.pop(user_id, None)
+    shared = shared_store()
+    if shared:
+        shared.srem(_user_key(user_id), sid)
+    return user_id
+
+
+def get_user(sid):
+    return _sid_users.get(sid)
+
+
+def user_sids(user_id):
+    """Return every sid ``user_id`` has open, on any worker."""
+    shared = shared_store()
+    if shared:
+        return set(shared.smembers(_user_key(user_id)))
+    with _lock:
+        return set(_user_sids.get(user_id, ()))
@@ -0,0 +1,142 @@
+# app/utils/user_stats.py
+from datetime import datetime
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from app import db
+from app.models.game import GameStatus, GameOutcome, time_control_category
+from app.models.archived_game import game_history
+from app.models.user import User
+from app.models.user_stats import UserStats
+from app.models.wallet_transaction import WalletTransaction, TransactionType
+
+RESULTS = (GameOutcome.WHITE_WIN, GameOutcome.BLACK_WIN, GameOutcome.DRAW)
+
+
+def _insert():
+    if db.session.get_bind().dialect.name == "postgresql":
+        return postgresql.insert
+    return sqlite.insert
+
+
+def bump_stats(user_id, **deltas):
+    """Atomically add ``deltas`` to ``user_id``'s counters, creating the row.
+
+    A single ``INSERT ... ON CONFLICT DO UPDATE`` so concurrent settlements
+    never lose an increment. The row lock is held until the caller commits;
+    callers touching two players bump them in user id order.
+    """
+    stmt = _insert()(UserStats).values(
+        user_id=user_id, updated_at=datetime.utcnow(), **deltas
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UserStats.user_id],
+        set_={
+            **{name: getattr(UserStats, name) + stmt.excluded[name] for name in deltas},
+            "updated_at": stmt.excluded.updated_at,
+        },
+    )
+    db.session.execute(stmt)
+
+
+def result_deltas(outcome, is_white, base_time, increment):
+    """Counter increments for one finished game, from one player's side."""
+    if outcome == GameOutcome.DRAW:
+        result = "draws"
+    elif outcome == (GameOutcome.WHITE_WIN if is_white else GameOutcome.BLACK_WIN):
+        result = "wins"
+    else:
+        result = "losses"
+    category = time_control_category(base_time, increment)
+    return {"games_played": 1, result: 1, f"{category}_games": 1}
+
+
+def record_game_result(game):
+    """Stage both players' result counters for a finished game; caller commits."""
+    if game.outcome not in RESULTS or not game.black_player_id:
+        return
+    for user_id in sorted([game.white_player_id, game.black_player_id]):
+        bump_stats(
+            user_id,
+            **result_deltas(
+                game.outcome,
+                user_id == game.white_player_id,
+                game.base_time,
+                game.increment,
+            ),
+        )
+
+
+def rebuild_user_stats(chunk_size=1000):
+    """Recompute every row of user_stats from games (live and archived) and the ledger.
+
+    Walks users in id order ``chunk_size`` at a time; each chunk is a few
+    grouped queries and is committed on its own. Settlements that land on a
+    chunk while it is rebuilt can be lost, so run it while play is paused.
+    Returns the number of users processed.
+    """
+    games = game_history(
+        "id", "white_player_id", "black_player_id", "status", "outcome", "base_time", "increment"
+    )
+    last_id, total = "", 0
+    while True:
+        user_ids = db.session.execute(
+            db.select(User.id).where(User.id > last_id).order_by(User.id).limit(chunk_size)
+        ).scalars().all()
+        if not user_ids:
+            return total
+        stats = {user_id: dict.fromkeys(UserStats.COUNTERS, 0) for user_id in user_ids}
+
+        for is_white, player_id in ((True, games.c.white_player_id), (False, games.c.black_player_id)):
+            results = (
+                db.session.query(
+                    player_id, games.c.outcome, games.c.base_time, games.c.increment, func.count()
+                )
+                .filter(
+                    player_id.in_(user_ids),
+                    games.c.status == GameStatus.COMPLETED,
+                    games.c.outcome.in_(RESULTS),
+                    games.c.black_player_id.isnot(None),
+                )
+                .group_by(player_id, games.c.outcome, games.c.base_time, games.c.increment)
+            )
+            for user_id, outcome, base_time, increment, count in results:
+                for name, delta in result_deltas(outcome, is_white, base_time, increment).items():
+                    stats[user_id][name] += delta * count
+
+        money = (
+            db.session.query(
+                WalletTransaction.user_id,
+                WalletTransaction.transaction_type,
+                games.c.status,
+                func.sum(WalletTransaction.amount),
+            )
+            .join(games, games.c.id == WalletTransaction.game_id)
+            .filter(
+                WalletTransaction.user_id.in_(user_ids),
+                WalletTransaction.status == "success",
+                WalletTransaction.transaction_type.in_(
+                    [TransactionType.BET, TransactionType.WINNINGS, TransactionType.REFUND]
+                ),
+            )
+            .group_by(WalletTransaction.user_id, WalletTransaction.transaction_type, games.c.status)
+        )
+        for user_id, transaction_type, game_status, amount in money:
+            amount = int(amount or 0)
+            stats[user_id]["net_earnings"] += amount
+            # Bets are stored negative; a cancelled game's refund unwinds its bet
+            if transaction_type == TransactionType.BET or (
+                transaction_type == TransactionType.REFUND
+                and game_status == GameStatus.CANCELLED
+            ):
+                stats[user_id]["total_wagered"] -= amount
+
+        now = datetime.utcnow()
+        UserStats.query.filter(UserStats.user_id.in_(user_ids)).delete(
+            synchronize_session=False
+        )
+        db.session.execute(
+            db.insert(UserStats),
+            [{"user_id": user_id, "updated_at": now, **row} for user_id, row in stats.items()],
+        )
+        db.session.commit()
+        last_id, total = user_ids[-1], total + len(user_ids)
@@ -1,21 +1,28 @@
 # app/utils/wallet.py
 from app import db
 from app.models.user import User
+from app.models.game import GameStatus, GameOutcome
 from app.models.wallet_transaction import (
     WalletTransaction,
     TransactionType,
     PaymentMethod,
 )
 from datetime import datetime
+from sqlalchemy import update
+from sqlalchemy.orm.attributes import set_committed_value
 import requests
 from config import Config
 import base64
 import json
+import uuid
+from app.utils.money import apply_rate, CENTS
+from app.utils.daraja import get_daraja_client
+from app.utils.user_stats import bump_stats
 
 # --- Utility Functions ---
 
 
-def log_wallet_transaction(
+def stage_wallet_transaction(
     user_id,
     amount,
     transaction_type,
@@ -25,8 +32,15 @@ def log_wallet_transaction(
     payment_method=None,
     external_transaction_id=None,
     status="pending",
+    checkout_request_id=None,
 ):
+    """Add a ledger row to the session without committing it.
+
+    Settlement paths stage every row for a game and let the caller commit
+    once, so balances, ledger rows and the game's final state land together.
+    """
     tx = WalletTransaction(
+        uuid=str(uuid.uuid4()),
         user_id=user_id,
         amount=amount,
         transaction_type=transaction_type,
@@ -37,111 +51,155 @@ def log_wallet_transaction(
         payment_method=payment_method,
         external_transaction_id=external_transaction_id,
         status=status,
+        checkout_request_id=checkout_request_id,
     )
     db.session.add(tx)
+    return tx
+
+
+def adjust_balance(user, delta, error="Insufficient funds"):
+    """Atomically add ``delta`` to ``user``'s balance in the database.
+
+    Runs ``UPDATE ... SET wallet_balance = wallet_balance + :delta RETURNING``
+    so concurrent settlements never lose an update, and refuses (raising
+    ValueError) any debit that would take the balance below zero. The row lock
+    is held until the caller commits; callers touching two wallets must adjust
+    them in user id order (see ``refund_bets``) to avoid deadlocks.
+    """
+    stmt = (
+        update(User)
+        .where(User.id == user.id)
+        .values(wallet_balance=User.wallet_balance + delta)
+        .returning(User.wallet_balance)
+    )
+    if delta < 0:
+        stmt = stmt.where(User.wallet_balance + delta >= 0)
+    balance = db.session.execute(
+        stmt, execution_options={"synchronize_session": False}
+    ).scalar()
+    if balance is None:
+        raise ValueError(error)
+    set_committed_value(user, "wallet_balance", balance)
+    return balance
+
+
+def log_wallet_transaction(*args, **kwargs):
+    tx = stage_wallet_transaction(*args, **kwargs)
     db.session.commit()  # Commit to ensure transaction is saved
     return tx
 
 
 def handle_wallet_bet(user, amount, game_id=None):
-    if user.wallet_balance < amount:
-        raise ValueError("Insufficient funds for the bet")
-    user.wallet_balance -= amount
-    tx = log_wallet_transaction(
+    """Stage a bet deduction; the caller commits it together with the game."""
+    balance = adjust_balance(user, -amount, "Insufficient funds for the bet")
+    tx = stage_wallet_transaction(
         user.id,
         -amount,
         TransactionType.BET,
         game_id,
         "Game bet deduction",
-        balance_after=user.wallet_balance,
+        balance_after=balance,
+        status="success",
     )
+    bump_stats(user.id, total_wagered=amount, net_earnings=-amount)
     return tx
 
 
 def handle_platform_fee(user, fee_amount, game_id=None):
-    if user.wallet_balance < fee_amount:
-        raise ValueError("Insufficient funds for platform fee")
-    user.wallet_balance -= fee_amount
+    balance = adjust_balance(user, -fee_amount, "Insufficient funds for platform fee")
     tx = log_wallet_transaction(
         user.id,
         -fee_amount,
         TransactionType.PLATFORM_FEE,
         game_id,
         "Platform fee deduction",
-        balance_after=user.wallet_balance,
+        balance_after=balance,
     )
     return tx
 
 
+def platform_cut(game):
+    """The platform's share, in cents, of a decisive game's pot."""
+    return apply_rate(
+        game.bet_amount, game.platform_fee if game.platform_fee is not None else 0.2
+    )
+
+
+def game_net_winnings(game):
+    """{user_id: cents won or lost} once ``game``'s settlement has committed."""
+    if not game.bet_amount or game.bet_amount <= 0 or not game.black_player_id:
+        return {}
+    if game.outcome == GameOutcome.WHITE_WIN:
+        winner_id, loser_id = game.white_player_id, game.black_player_id
+    elif game.outcome == GameOutcome.BLACK_WIN:
+        winner_id, loser_id = game.black_player_id, game.white_player_id
+    else:
+        return {}  # Draws and cancellations refund both stakes
+    return {
+        winner_id: game.bet_amount - platform_cut(game),
+        loser_id: -game.bet_amount,
+    }
+
+
 def distribute_winnings(game):
+    """Stage the payout for a finished game; the caller commits once."""
     if not game.bet_amount or game.bet_amount <= 0:
         return
     white = game.white_player
     black = game.black_player
     total_pot = 2 * game.bet_amount
-    platform_cut = (
-        round(game.bet_amount * game.platform_fee, 2)
-        if hasattr(game, "platform_fee")
-        else round(game.bet_amount * 0.2, 2)
-    )
-    winner_amount = round(total_pot - platform_cut, 2)
+    winner_amount = total_pot - platform_cut(game)
     winner = None
     winner_note = ""
     loser = None
-    if game.outcome == game.__class__.GameOutcome.WHITE_WIN:
+    if game.outcome == GameOutcome.WHITE_WIN:
         winner, loser = white, black
         winner_note = "White wins"
-    elif game.outcome == game.__class__.GameOutcome.BLACK_WIN:
+    elif game.outcome == GameOutcome.BLACK_WIN:
         winner, loser = black, white
         winner_note = "Black wins"
     if winner:
-        winner.wallet_balance += winner_amount
-        winner_tx = log_wallet_transaction(
+        balance = adjust_balance(winner, winner_amount)
+        winner_tx = stage_wallet_transaction(
             winner.id,
             winner_amount,
             TransactionType.WINNINGS,
             game.id,
             f"{winner_note}, received winnings",
-            balance_after=winner.wallet_balance,
+            balance_after=balance,
+            status="success",
+        )
+        game.payout_txn_id = winner_tx.uuid
+        bump_stats(winner.id, net_earnings=winner_amount)
+    elif game.outcome == GameOutcome.DRAW:
+        refund_bets(game, note="Draw refund")
+
+
+def refund_bets(game, note="Refund for incomplete/canceled match"):
+    """Stage stake refunds for every seated player; the caller commits once."""
+    if not game.bet_amount or game.bet_amount <= 0:
+        return
+    players = [p for p in (game.white_player, game.black_player) if p]
+    # A draw refund returns a stake that was played for; a cancellation
+    # unwinds the wager entirely
+    wagered = -game.bet_amount if game.status == GameStatus.CANCELLED else 0
+    for player in sorted(players, key=lambda p: p.id):  # Consistent lock order
+        balance = adjust_balance(player, game.bet_amount)
+        bump_stats(player.id, total_wagered=wagered, net_earnings=game.bet_amount)
+        stage_wallet_transaction(
+            player.id,
+            game.bet_amount,
+            TransactionType.REFUND,
+            game.id,
+            note,
+            balance_after=balance,
+            status="success",
         )
-    elif game.outcome == game.__class__.GameOutcome.DRAW:
-        for player in [white, black]:
-            if player:
-                player.wallet_balance += game.bet_amount
-                log_wallet_transaction(
-                    player.id,
-                    game.bet_amount,
-                    TransactionType.REFUND,
-                    game.id,
-                    "Draw refund",
-                    balance_after=player.wallet_balance,
-                )
-
-
-def refund_bets(game):
-    for player in [game.white_player, game.black_player]:
-        if player:
-            player.wallet_balance += game.bet_amount
-            log_wallet_transaction(
-                player.id,
-                game.bet_amount,
-                TransactionType.REFUND,
-                game.id,
-                "Refund for incomplete/canceled match",
-                balance_after=player.wallet_balance,
-            )
 
 
 def get_mpesa_access_token():
-    url = f"{Config.MPESA_API_URL}/oauth/v1/generate?grant_type=client_credentials"
-    auth = base64.b64encode(
-        f"{Config.MPESA_CONSUMER_KEY}:{Config.MPESA_CONSUMER_SECRET}".encode()
-    ).decode()
-    headers = {"Authorization": f"Basic {auth}", "Content-Type": "application/json"}
     try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        return response.json().get("access_token")
+        return get_daraja_client().access_token()
     except requests.RequestException as e:
         raise Exception(f"Failed to get MPesa access token: {str(e)}")
 
@@ -157,14 +215,12 @@ def validate_phone_number(phone_number):
     return phone
 
 
-def initiate_mpesa_stk_push(user, amount, phone_number=None, note="Wallet Deposit"):
-    target_phone = phone_number if phone_number else user.phone_number
-    try:
-        target_phone = validate_phone_number(target_phone)
-    except ValueError as e:
-        raise ValueError(str(e))
-    access_token = get_mpesa_access_token()
-    url = f"{Config.MPESA_API_URL}/mpesa/stkpush/v1/processrequest"
+def send_mpesa_stk_push(user_id, amount, phone, note="Wallet Deposit"):
+    """POST one STK push for ``amount`` cents to an already validated ``phone``.
+
+    Returns Daraja's response body; transport and HTTP errors surface as
+    ``requests.RequestException`` so callers can decide whether to retry.
+    """
     timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
     password = base64.b64encode(
         f"{Config.MPESA_BUSINESS_SHORTCODE}{Config.MPESA_PASSKEY}{timestamp}".encode()
@@ -174,22 +230,25 @@ def initiate_mpesa_stk_push(user, amount, phone_number=None, note="Wallet Deposi
         "Password": password,
         "Timestamp": timestamp,
         "TransactionType": "CustomerPayBillOnline",
-        "Amount": int(amount),
-        "PartyA": target_phone,
+        "Amount": amount // CENTS,  # Daraja takes whole shillings
+        "PartyA": phone,
         "PartyB": Config.MPESA_BUSINESS_SHORTCODE,
-        "PhoneNumber": target_phone,
+        "PhoneNumber": phone,
         "CallBackURL": Config.MPESA_CALLBACK_URL,
-        "AccountReference": f"Deposit-{user.id}",
+        "AccountReference": f"Deposit-{user_id}",
         "TransactionDesc": note,
     }
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Content-Type": "application/json",
-    }
+    return get_daraja_client().post("/mpesa/stkpush/v1/processrequest", payload)
+
+
+def initiate_mpesa_stk_push(user, amount, phone_number=None, note="Wallet Deposit"):
+    target_phone = phone_number if phone_number else user.phone_number
+    try:
+        target_phone = validate_phone_number(target_phone)
+    except ValueError as e:
+        raise ValueError(str(e))
     try:
-        response = requests.post(url, json=payload, headers=headers)
-        response.raise_for_status()
-        result = response.json()
+        result = send_mpesa_stk_push(user.id, amount, target_phone, note)
         if result.get("ResponseCode") == "0":
             tx = log_wallet_transaction(
                 user_id=user.id,
@@ -198,7 +257,7 @@ def initiate_mpesa_stk_push(user, amount, phone_number=None, note="Wallet Deposi
                 note=f"MPesa STK Push initiated: {note}",
                 balance_after=user.wallet_balance,
                 payment_method=PaymentMethod.MPESA,
-                external_transaction_id=result.get("CheckoutRequestID"),
+                checkout_request_id=result.get("CheckoutRequestID"),
                 status="pending",
             )
             return tx, result
@@ -18,6 +18,17 @@ class Config:
     FACEBOOK_CLIENT_ID = os.getenv("FACEBOOK_CLIENT_ID", "")
     FACEBOOK_CLIENT_SECRET = os.getenv("FACEBOOK_CLIENT_SECRET", "")
     UPLOAD_FOLDER = os.path.abspath(os.path.join(os.path.dirname(__file__), "uploads"))
+    MOVE_ENCODING = os.getenv("MOVE_ENCODING", "packed")  # "packed" or "text"
+    CLOCK_TICK = float(os.getenv("CLOCK_TICK", "0.5"))  # Max seconds between clock checks
+    MATCHMAKING_RATING_WINDOW = int(os.getenv("MATCHMAKING_RATING_WINDOW", "200"))
+    MATCHMAKING_SEEK_TTL = int(os.getenv("MATCHMAKING_SEEK_TTL", "60"))  # Seconds a REST seek lives between polls
+    SOCKETIO_MESSAGE_QUEUE = os.getenv("SOCKETIO_MESSAGE_QUEUE", "")  # e.g. redis://localhost:6379/0
+    SPECTATOR_BROADCAST_INTERVAL = float(os.getenv("SPECTATOR_BROADCAST_INTERVAL", "1.0"))  # 0 = per move
+    BOARD_CACHE_SIZE = int(os.getenv("BOARD_CACHE_SIZE", "1000"))  # Live boards kept per process
+    RATING_INITIAL = int(os.getenv("RATING_INITIAL", "800"))
+    RATING_K_FACTOR = float(os.getenv("RATING_K_FACTOR", "32"))
+    ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "90"))  # Finished games older than this leave `games`
+    ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "1000"))  # Games moved per transaction
 
     # MPesa Daraja API Configuration
     MPESA_CONSUMER_KEY = os.getenv("MPESA_CONSUMER_KEY", "")
@@ -30,4 +41,11 @@ class Config:
     MPESA_PARTY_A = os.getenv("MPESA_PARTY_A", "600999")  # Shortcode for B2C
     MPESA_PARTY_B = os.getenv("MPESA_PARTY_B", "600000")  # Shortcode for STK Push
     MPESA_PHONE_NUMBER = os.getenv("MPESA_PHONE_NUMBER", "254708374149")  # Test phone number
-    MPESA_CALLBACK_URL = os.getenv("MPESA_CALLBACK_URL", "https://yourdomain.com/api/mpesa/callback")
\ No newline at end of file
+    MPESA_CALLBACK_URL = os.getenv("MPESA_CALLBACK_URL", "https://yourdomain.com/api/mpesa/callback")
+    MPESA_CONNECT_TIMEOUT = float(os.getenv("MPESA_CONNECT_TIMEOUT", "3.05"))  # Seconds
+    MPESA_READ_TIMEOUT = float(os.getenv("MPESA_READ_TIMEOUT", "15"))  # Seconds
+    MPESA_POOL_SIZE = int(os.getenv("MPESA_POOL_SIZE", "10"))  # Keep-alive connections to Daraja
+    DEPOSIT_WORKERS = int(os.getenv("DEPOSIT_WORKERS", "4"))  # Concurrent STK pushes per process
+    DEPOSIT_MAX_ATTEMPTS = int(os.getenv("DEPOSIT_MAX_ATTEMPTS", "4"))
+    DEPOSIT_RETRY_BACKOFF = float(os.getenv("DEPOSIT_RETRY_BACKOFF", "1.0"))  # Seconds, doubled per retry
+    DEPOSIT_SWEEP_INTERVAL = float(os.getenv("DEPOSIT_SWEEP_INTERVAL", "30"))  # Seconds between unsent deposit sweeps
\ No newline at end of file
@@ -0,0 +1,59 @@
+"""game position snapshot
+
+Revision ID: 5c1e7a9d2f40
+Revises: 094d71f3c335
+Create Date: 2025-06-20 10:14:03.512877
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import chess
+
+
+# revision identifiers, used by Alembic.
+revision = '5c1e7a9d2f40'
+down_revision = '094d71f3c335'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 500
+
+games = sa.table(
+    'games',
+    sa.column('id', sa.String),
+    sa.column('moves', sa.Text),
+    sa.column('current_fen', sa.String),
+    sa.column('ply', sa.Integer),
+)
+
+
+def upgrade():
+    with op.batch_alter_table('games', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('current_fen', sa.String(length=100), nullable=True))
+        batch_op.add_column(sa.Column('ply', sa.Integer(), nullable=False, server_default='0'))
+
+    # Backfill the snapshot by replaying each game once, in batches
+    conn = op.get_bind()
+    while True:
+        rows = conn.execute(
+            sa.select(games.c.id, games.c.moves)
+            .where(games.c.current_fen.is_(None))
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        for game_id, moves in rows:
+            board = chess.Board()
+            for move in (moves or "").split():
+                board.push_san(move)
+            conn.execute(
+                games.update()
+                .where(games.c.id == game_id)
+                .values(current_fen=board.fen(), ply=len(board.move_stack))
+            )
+
+
+def downgrade():
+    with op.batch_alter_table('games', schema=None) as batch_op:
+        batch_op.drop_column('ply')
+        batch_op.drop_column('current_fen')
@@ -0,0 +1,84 @@
+"""packed game moves
+
+Revision ID: 8e4b2c6a1d73
+Revises: 5c1e7a9d2f40
+Create Date: 2025-06-23 15:41:27.208314
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import chess
+
+
+# revision identifiers, used by Alembic.
+revision = '8e4b2c6a1d73'
+down_revision = '5c1e7a9d2f40'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 500
+
+games = sa.table(
+    'games',
+    sa.column('id', sa.String),
+    sa.column('moves', sa.Text),
+    sa.column('moves_packed', sa.LargeBinary),
+)
+
+
+def _pack(moves):
+    # Same layout as app/utils/move_codec.py, inlined so the migration stays frozen
+    board = chess.Board()
+    packed = bytearray()
+    for san in (moves or "").split():
+        move = board.parse_san(san)
+        value = move.from_square | (move.to_square << 6) | ((move.promotion or 0) << 12)
+        packed += value.to_bytes(2, "big")
+        board.push(move)
+    return bytes(packed)
+
+
+def upgrade():
+    with op.batch_alter_table('games', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('moves_packed', sa.LargeBinary(), nullable=True))
+
+    # Convert the SAN text column in batches; `moves` is left in place for downgrade
+    conn = op.get_bind()
+    while True:
+        rows = conn.execute(
+            sa.select(games.c.id, games.c.moves)
+            .where(games.c.moves_packed.is_(None))
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        for game_id, moves in rows:
+            conn.execute(
+                games.update()
+                .where(games.c.id == game_id)
+                .values(moves_packed=_pack(moves))
+            )
+
+
+def downgrade():
+    conn = op.get_bind()
+    rows = conn.execute(
+        sa.select(games.c.id, games.c.moves_packed).where(
+            games.c.moves_packed.isnot(None)
+        )
+    ).fetchall()
+    for game_id, packed in rows:
+        board = chess.Board()
+        san_moves = []
+        packed = bytes(packed)
+        for i in range(0, len(packed), 2):
+            value = int.from_bytes(packed[i : i + 2], "big")
+            move = chess.Move(value & 0x3F, (value >> 6) & 0x3F, (value >> 12) & 0x7 or None)
+            san_moves.append(board.san(move))
+            board.push(move)
+        conn.execute(
+            games.update().where(games.c.id == game_id).values(moves=" ".join(san_moves))
+        )
+
+    with op.batch_alter_table('games', schema=None) as batch_op:
+        batch_op.drop_column('moves_packed')
@@ -0,0 +1,65 @@
+"""wallet checkout request id
+
+Revision ID: a9d4e6f21c38
+Revises: f2a6d8c4e1b9
+Create Date: 2025-07-14 11:20:37.905216
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9d4e6f21c38'
+down_revision = 'f2a6d8c4e1b9'
+branch_labels = None
+depends_on = None
+
+INDEX = 'ix_wallet_transactions_checkout_request_id'
+
+
+def _is_postgres():
+    return op.get_bind().dialect.name == 'postgresql'
+
+
+def upgrade():
+    with op.batch_alter_table('wallet_transactions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('checkout_request_id', sa.String(length=50), nullable=True))
+
+    # Deposits still waiting on their callback hold the CheckoutRequestID in
+    # external_transaction_id; settled ones already had it replaced by the
+    # receipt number, so there is nothing to recover for those.
+    op.execute(
+        "UPDATE wallet_transactions SET checkout_request_id = external_transaction_id "
+        "WHERE transaction_type = 'deposit' AND payment_method = 'mpesa' "
+        "AND status = 'pending' AND external_transaction_id IS NOT NULL"
+    )
+    op.execute(
+        "UPDATE wallet_transactions SET external_transaction_id = NULL "
+        "WHERE checkout_request_id IS NOT NULL"
+    )
+
+    if _is_postgres():
+        with op.get_context().autocommit_block():
+            op.create_index(
+                INDEX, 'wallet_transactions', ['checkout_request_id'], unique=True,
+                postgresql_concurrently=True, if_not_exists=True,
+            )
+        return
+
+    op.create_index(INDEX, 'wallet_transactions', ['checkout_request_id'], unique=True)
+
+
+def downgrade():
+    if _is_postgres():
+        with op.get_context().autocommit_block():
+            op.drop_index(INDEX, table_name='wallet_transactions', postgresql_concurrently=True, if_exists=True)
+    else:
+        op.drop_index(INDEX, table_name='wallet_transactions')
+
+    op.execute(
+        "UPDATE wallet_transactions SET external_transaction_id = checkout_request_id "
+        "WHERE status = 'pending' AND checkout_request_id IS NOT NULL"
+    )
+    with op.batch_alter_table('wallet_transactions', schema=None) as batch_op:
+        batch_op.drop_column('checkout_request_id')
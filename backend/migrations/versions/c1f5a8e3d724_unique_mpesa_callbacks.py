@@ -0,0 +1,35 @@
+"""unique mpesa callbacks
+
+Revision ID: c1f5a8e3d724
+Revises: e4a1f7c3b962
+Create Date: 2025-07-25 10:36:09.512847
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c1f5a8e3d724'
+down_revision = 'e4a1f7c3b962'
+branch_labels = None
+depends_on = None
+
+INDEX = 'ix_mpesa_callbacks_checkout_request_id'
+
+
+def upgrade():
+    # Keep the first delivery of each callback; later ones were redeliveries
+    op.execute(
+        "DELETE FROM mpesa_callbacks WHERE id NOT IN "
+        "(SELECT MIN(id) FROM mpesa_callbacks GROUP BY checkout_request_id)"
+    )
+    with op.batch_alter_table('mpesa_callbacks', schema=None) as batch_op:
+        batch_op.drop_index(INDEX)
+        batch_op.create_index(INDEX, ['checkout_request_id'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('mpesa_callbacks', schema=None) as batch_op:
+        batch_op.drop_index(INDEX)
+        batch_op.create_index(INDEX, ['checkout_request_id'], unique=False)
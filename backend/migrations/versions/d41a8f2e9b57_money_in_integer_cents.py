@@ -0,0 +1,75 @@
+"""money in integer cents
+
+Revision ID: d41a8f2e9b57
+Revises: b3f90d17c6e2
+Create Date: 2025-07-02 12:08:44.903216
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd41a8f2e9b57'
+down_revision = 'b3f90d17c6e2'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 5000
+
+# (table, primary key, money columns, nullable)
+MONEY_COLUMNS = [
+    ('users', 'id', ['wallet_balance'], True),
+    ('games', 'id', ['bet_amount'], False),
+    ('wallet_transactions', 'id', ['amount'], False),
+    ('wallet_transactions', 'id', ['balance_after'], True),
+]
+
+
+def _convert(table, pk, column, expression):
+    """Fill ``<column>_tmp`` from ``expression`` in primary-key batches."""
+    conn = op.get_bind()
+    last = None
+    while True:
+        where = f"WHERE {pk} > :last" if last is not None else ""
+        ids = [
+            row[0]
+            for row in conn.execute(
+                sa.text(f"SELECT {pk} FROM {table} {where} ORDER BY {pk} LIMIT :limit"),
+                {"last": last, "limit": BATCH_SIZE},
+            )
+        ]
+        if not ids:
+            break
+        conn.execute(
+            sa.text(
+                f"UPDATE {table} SET {column}_tmp = {expression} "
+                f"WHERE {pk} >= :first AND {pk} <= :last"
+            ),
+            {"first": ids[0], "last": ids[-1]},
+        )
+        last = ids[-1]
+
+
+def _swap(new_type, expression):
+    for table, pk, columns, nullable in MONEY_COLUMNS:
+        for column in columns:
+            with op.batch_alter_table(table, schema=None) as batch_op:
+                batch_op.add_column(sa.Column(f'{column}_tmp', new_type, nullable=True))
+            _convert(table, pk, column, expression.format(column=column))
+            with op.batch_alter_table(table, schema=None) as batch_op:
+                batch_op.drop_column(column)
+                batch_op.alter_column(
+                    f'{column}_tmp',
+                    new_column_name=column,
+                    existing_type=new_type,
+                    nullable=nullable,
+                )
+
+
+def upgrade():
+    _swap(sa.BigInteger(), "CAST(ROUND({column} * 100) AS BIGINT)")
+
+
+def downgrade():
+    _swap(sa.Float(), "{column} / 100.0")
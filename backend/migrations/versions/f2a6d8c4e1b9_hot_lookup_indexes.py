@@ -0,0 +1,59 @@
+"""hot lookup indexes
+
+Revision ID: f2a6d8c4e1b9
+Revises: e7c3a5b19f08
+Create Date: 2025-07-10 09:42:16.118734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2a6d8c4e1b9'
+down_revision = 'e7c3a5b19f08'
+branch_labels = None
+depends_on = None
+
+# games.white_player_id / black_player_id are already covered as the leading
+# column of the (player_id, created_at) indexes from e7c3a5b19f08.
+LIVE_STATUSES = sa.text("status IN ('PENDING', 'ACTIVE')")
+
+INDEXES = [
+    ('ix_games_status_live', 'games', ['status'], LIVE_STATUSES),
+    ('ix_wallet_transactions_external_transaction_id', 'wallet_transactions', ['external_transaction_id'], None),
+    ('ix_wallet_transactions_user_id', 'wallet_transactions', ['user_id'], None),
+    ('ix_wallet_transactions_game_id', 'wallet_transactions', ['game_id'], None),
+]
+
+
+def _is_postgres():
+    return op.get_bind().dialect.name == 'postgresql'
+
+
+def upgrade():
+    if _is_postgres():
+        # CONCURRENTLY can't run inside the migration transaction, and avoids
+        # locking writes on the live tables while the index builds
+        with op.get_context().autocommit_block():
+            for name, table, columns, where in INDEXES:
+                op.create_index(
+                    name, table, columns, unique=False,
+                    postgresql_concurrently=True, postgresql_where=where,
+                    if_not_exists=True,
+                )
+        return
+
+    for name, table, columns, where in INDEXES:
+        op.create_index(name, table, columns, unique=False, sqlite_where=where)
+
+
+def downgrade():
+    if _is_postgres():
+        with op.get_context().autocommit_block():
+            for name, table, columns, where in reversed(INDEXES):
+                op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+        return
+
+    for name, table, columns, where in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -1,3 +1,5 @@
 from app import create_app
+from app.services.deposits import start_deposit_workers
 
 application = create_app()
+start_deposit_workers()
@@ -1,9 +1,19 @@
 # run.py
+import os
+import eventlet
+
+eventlet.monkey_patch()  # Required for the Socket.IO message queue client
+
 from app import create_app
 from app.routes.socket import socketio  
+from app.services.deposits import start_deposit_workers
 
 app = create_app()
 
 if __name__ == '__main__':
-    socketio.run(app, host="0.0.0.0", port=4747, debug=True, log_output=True)
+    # The debug reloader runs this in a watcher process too; only its child serves
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        start_deposit_workers()
+    port = int(os.getenv("PORT", "4747"))
+    socketio.run(app, host="0.0.0.0", port=port, debug=True, log_output=True)
 
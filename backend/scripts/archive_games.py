@@ -0,0 +1,37 @@
+# scripts/archive_games.py
+"""Move old finished games from games into archived_games.
+
+Completed and cancelled games created more than --days ago (default
+ARCHIVE_AFTER_DAYS) are copied to the archive with their moves compressed
+and deleted from the live table, --batch-size games per transaction. Safe to
+run while play continues and to interrupt; schedule it nightly, e.g.:
+
+    python scripts/archive_games.py --days 90 --batch-size 2000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app import create_app  # noqa: E402
+from app.services.archive import archive_games  # noqa: E402
+from config import Config  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=Config.ARCHIVE_AFTER_DAYS)
+    parser.add_argument("--batch-size", type=int, default=Config.ARCHIVE_BATCH_SIZE)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        started = time.time()
+        games = archive_games(args.days, args.batch_size)
+        print(f"Archived {games} games in {time.time() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
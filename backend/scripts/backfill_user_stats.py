@@ -0,0 +1,35 @@
+# scripts/backfill_user_stats.py
+"""Rebuild the user_stats table from games and wallet_transactions.
+
+Run once after migrating to c5b8e2d7f416, and any time the table needs to be
+rebuilt from scratch. Players are processed --chunk-size at a time in id
+order, each chunk in its own transaction. Pause play while it runs;
+settlements that land on a chunk mid-rebuild can be lost:
+
+    python scripts/backfill_user_stats.py --chunk-size 2000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app import create_app  # noqa: E402
+from app.utils.user_stats import rebuild_user_stats  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        started = time.time()
+        users = rebuild_user_stats(args.chunk_size)
+        print(f"Rebuilt stats for {users} players in {time.time() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+# scripts/daraja_simulator.py
+"""Local stand-in for the Safaricom Daraja API.
+
+Serves the two endpoints the backend uses -- OAuth token generation and STK
+push -- and, for every accepted push, POSTs an stkCallback back to the
+push's CallBackURL after a delay, the way Safaricom does once the customer
+answers the prompt on their phone:
+
+    python scripts/daraja_simulator.py --port 8089 --latency-ms 300 \\
+        --failure-rate 0.05 --cancel-rate 0.1 --duplicate-rate 0.05
+
+    MPESA_API_URL=http://127.0.0.1:8089 \\
+    MPESA_CALLBACK_URL=http://127.0.0.1:4747/mpesa/callback python run.py
+
+Only stdlib is used, so it runs anywhere the backend does. Ctrl-C prints
+what was served.
+"""
+import argparse
+import base64
+import json
+import random
+import threading
+import time
+import uuid
+import urllib.request
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class Simulator:
+    def __init__(self, args):
+        self.args = args
+        self.tokens = {}  # token -> monotonic expiry
+        self.stats = Counter()
+        self.lock = threading.Lock()
+
+    def issue_token(self):
+        token = uuid.uuid4().hex
+        with self.lock:
+            self.tokens[token] = time.monotonic() + self.args.token_ttl
+            self.stats["oauth"] += 1
+        return token
+
+    def token_valid(self, header):
+        token = header[len("Bearer "):] if header.startswith("Bearer ") else None
+        with self.lock:
+            return token is not None and self.tokens.get(token, 0) > time.monotonic()
+
+    def count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    def delay(self):
+        latency = random.gauss(self.args.latency_ms, self.args.jitter_ms)
+        time.sleep(max(latency, 0) / 1000)
+
+    def schedule_callback(self, payload, checkout_request_id):
+        url = self.args.callback_url or payload.get("CallBackURL")
+        cancelled = random.random() < self.args.cancel_rate
+        if cancelled:
+            callback = {
+                "MerchantRequestID": checkout_request_id,
+                "CheckoutRequestID": checkout_request_id,
+                "ResultCode": 1032,
+                "ResultDesc": "Request cancelled by user",
+            }
+        else:
+            callback = {
+                "MerchantRequestID": checkout_request_id,
+                "CheckoutRequestID": checkout_request_id,
+                "ResultCode": 0,
+                "ResultDesc": "The service request is processed successfully.",
+                "CallbackMetadata": {
+                    "Item": [
+                        {"Name": "Amount", "Value": payload.get("Amount")},
+                        {"Name": "MpesaReceiptNumber", "Value": uuid.uuid4().hex[:10].upper()},
+                        {"Name": "TransactionDate", "Value": int(time.strftime("%Y%m%d%H%M%S"))},
+                        {"Name": "PhoneNumber", "Value": int(payload.get("PhoneNumber") or 0)},
+                    ]
+                },
+            }
+        body = json.dumps({"Body": {"stkCallback": callback}}).encode()
+        deliveries = 2 if random.random() < self.args.duplicate_rate else 1
+        delay = self.args.callback_delay_ms / 1000
+        for attempt in range(deliveries):
+            timer = threading.Timer(delay * (attempt + 1), self.deliver, (url, body))
+            timer.daemon = True
+            timer.start()
+
+    def deliver(self, url, body):
+        request = urllib.request.Request(
+            url, data=body, headers={"Content-Type": "application/json"}
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=10) as response:
+                response.read()
+            self.count("callbacks_delivered")
+        except Exception as e:
+            self.count("callbacks_failed")
+            print(f"Callback to {url} failed: {e}")
+
+
+def make_handler(sim):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # Keep-alive, like the real API
+
+        def log_message(self, format, *args):
+            if sim.args.verbose:
+                super().log_message(format, *args)
+
+        def send_json(self, status, body):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if not self.path.startswith("/oauth/v1/generate"):
+                return self.send_json(404, {"errorMessage": "Not found"})
+            auth = self.headers.get("Authorization", "")
+            expected = base64.b64encode(
+                f"{sim.args.consumer_key}:{sim.args.consumer_secret}".encode()
+            ).decode()
+            if not auth.startswith("Basic ") or (
+                sim.args.consumer_key and auth[len("Basic "):] != expected
+            ):
+                sim.count("oauth_rejected")
+                return self.send_json(400, {"errorMessage": "Invalid Authentication passed"})
+            sim.delay()
+            self.send_json(
+                200,
+                {"access_token": sim.issue_token(), "expires_in": str(sim.args.token_ttl)},
+            )
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            if self.path != "/mpesa/stkpush/v1/processrequest":
+                return self.send_json(404, {"errorMessage": "Not found"})
+            if not sim.token_valid(self.headers.get("Authorization", "")):
+                sim.count("stk_unauthorized")
+                return self.send_json(401, {"errorMessage": "Invalid Access Token"})
+            sim.delay()
+            if random.random() < sim.args.failure_rate:
+                sim.count("stk_failed")
+                return self.send_json(503, {"errorMessage": "Service unavailable"})
+            if random.random() < sim.args.reject_rate:
+                sim.count("stk_rejected")
+                return self.send_json(
+                    200,
+                    {"ResponseCode": "1", "ResponseDescription": "Rejected by simulator"},
+                )
+            sim.count("stk_accepted")
+            checkout_request_id = f"ws_CO_{uuid.uuid4().hex}"
+            self.send_json(
+                200,
+                {
+                    "MerchantRequestID": uuid.uuid4().hex,
+                    "CheckoutRequestID": checkout_request_id,
+                    "ResponseCode": "0",
+                    "ResponseDescription": "Success. Request accepted for processing",
+                    "CustomerMessage": "Success. Request accepted for processing",
+                },
+            )
+            sim.schedule_callback(payload, checkout_request_id)
+
+    return Handler
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-ms", type=float, default=200, help="mean response latency")
+    parser.add_argument("--jitter-ms", type=float, default=50, help="latency std deviation")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="share of pushes answered 503")
+    parser.add_argument("--reject-rate", type=float, default=0.0, help="share of pushes rejected outright")
+    parser.add_argument("--cancel-rate", type=float, default=0.0, help="share of callbacks reporting a cancel")
+    parser.add_argument("--duplicate-rate", type=float, default=0.0, help="share of callbacks sent twice")
+    parser.add_argument("--callback-delay-ms", type=float, default=1000)
+    parser.add_argument("--callback-url", default="", help="override each push's CallBackURL")
+    parser.add_argument("--token-ttl", type=int, default=3599)
+    parser.add_argument("--consumer-key", default="", help="require these credentials for OAuth")
+    parser.add_argument("--consumer-secret", default="")
+    parser.add_argument("--verbose", action="store_true")
+    return parser
+
+
+def serve(args):
+    """Start the simulator in a background thread and return its server."""
+    sim = Simulator(args)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(sim))
+    server.daemon_threads = True
+    server.simulator = sim
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    args = build_parser().parse_args()
+    server = serve(args)
+    print(f"Daraja simulator listening on http://{args.host}:{server.server_port}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+        print(dict(server.simulator.stats))
+
+
+if __name__ == "__main__":
+    main()
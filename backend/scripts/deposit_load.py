@@ -0,0 +1,177 @@
+# scripts/deposit_load.py
+"""Load test for the M-Pesa deposit path, end to end.
+
+Start the Daraja simulator and a backend pointed at it, then drive deposits
+through the backend's HTTP API:
+
+    python scripts/daraja_simulator.py --port 8089
+    MPESA_API_URL=http://127.0.0.1:8089 \\
+    MPESA_CALLBACK_URL=http://127.0.0.1:4747/mpesa/callback python run.py
+    python scripts/deposit_load.py --api http://127.0.0.1:4747 \\
+        --deposits 1000 --concurrency 50
+
+The script needs the server's DATABASE_URL and JWT_SECRET_KEY: it seeds its
+own players straight into the database and mints their tokens. It then
+fires the deposits from --concurrency threads and watches the ledger until
+every deposit settles. It reports p50/p99 latency and throughput twice:
+once for POST /mpesa/deposit and once for the full path to a settled
+callback. Pass --cleanup to delete the seeded players afterwards.
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+import requests
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from flask_jwt_extended import create_access_token  # noqa: E402
+from app import create_app, db  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.models.wallet_transaction import WalletTransaction  # noqa: E402
+
+
+def percentile(values, pct):
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[max(math.ceil(pct / 100 * len(ordered)) - 1, 0)]
+
+
+def seed_users(count, run_id):
+    users = []
+    for i in range(count):
+        user = User(
+            first_name="Load",
+            last_name=str(i),
+            email=f"load{run_id}_{i}@example.com",
+            username=f"load{run_id}_{i}",
+            phone_number=f"+2547{run_id:04d}{i:04d}",
+            password="load",
+        )
+        users.append(user)
+    db.session.add_all(users)
+    db.session.commit()
+    return [(user.id, create_access_token(identity=user.id)) for user in users]
+
+
+def worker(api, jobs, results, lock):
+    session = requests.Session()
+    while True:
+        with lock:
+            if not jobs:
+                break
+            token, amount = jobs.pop()
+        started = time.monotonic()
+        try:
+            response = session.post(
+                f"{api}/mpesa/deposit",
+                json={"amount": amount},
+                headers={"Authorization": f"Bearer {token}"},
+                timeout=30,
+            )
+            body = response.json()
+            tx_id = (body.get("transaction") or {}).get("id")
+            status = response.status_code
+        except (requests.RequestException, ValueError) as e:
+            tx_id, status = None, type(e).__name__
+        results.append((started, time.monotonic(), status, tx_id))
+
+
+def wait_for_settlement(app, accepted, timeout, poll):
+    """Poll the ledger; return {tx_id: (settled_at, status)}."""
+    settled = {}
+    deadline = time.monotonic() + timeout
+    with app.app_context():
+        while len(settled) < len(accepted) and time.monotonic() < deadline:
+            pending = [tx_id for tx_id in accepted if tx_id not in settled]
+            now = time.monotonic()
+            for start in range(0, len(pending), 1000):
+                rows = (
+                    db.session.query(WalletTransaction.id, WalletTransaction.status)
+                    .filter(
+                        WalletTransaction.id.in_(pending[start:start + 1000]),
+                        WalletTransaction.status != "pending",
+                    )
+                    .all()
+                )
+                for tx_id, status in rows:
+                    settled[tx_id] = (now, status)
+            db.session.rollback()  # Fresh snapshot on the next poll
+            time.sleep(poll)
+    return settled
+
+
+def report(label, latencies, elapsed):
+    print(
+        f"{label:<10} n={len(latencies):<6} "
+        f"p50={percentile(latencies, 50) * 1000:8.1f}ms "
+        f"p99={percentile(latencies, 99) * 1000:8.1f}ms "
+        f"throughput={len(latencies) / elapsed if elapsed else 0:8.1f}/s"
+    )
+
+
+def cleanup(user_ids):
+    WalletTransaction.query.filter(WalletTransaction.user_id.in_(user_ids)).delete(
+        synchronize_session=False
+    )
+    User.query.filter(User.id.in_(user_ids)).delete(synchronize_session=False)
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--api", default="http://127.0.0.1:4747")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--deposits", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--amount", type=int, default=100, help="whole shillings per deposit")
+    parser.add_argument("--timeout", type=float, default=120, help="seconds to wait for callbacks")
+    parser.add_argument("--poll", type=float, default=0.05, help="ledger poll interval")
+    parser.add_argument("--cleanup", action="store_true")
+    args = parser.parse_args()
+
+    app = create_app()
+    run_id = random.randint(0, 9999)
+    with app.app_context():
+        users = seed_users(args.users, run_id)
+
+    jobs = [(users[i % len(users)][1], args.amount) for i in range(args.deposits)]
+    results, lock = [], threading.Lock()
+    threads = [
+        threading.Thread(target=worker, args=(args.api, jobs, results, lock))
+        for _ in range(args.concurrency)
+    ]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    requests_done = time.monotonic()
+
+    accepted = {tx_id: end for _, end, status, tx_id in results if status == 202 and tx_id}
+    settled = wait_for_settlement(app, accepted, args.timeout, args.poll)
+    finished = max((at for at, _ in settled.values()), default=requests_done)
+
+    print(f"Request statuses: {dict(Counter(status for _, _, status, _ in results))}")
+    print(f"Settled: {dict(Counter(status for _, status in settled.values()))}, "
+          f"still pending: {len(accepted) - len(settled)}")
+    report("request", [end - start for start, end, _, _ in results], requests_done - started)
+    report(
+        "settled",
+        [settled[tx_id][0] - start for start, _, _, tx_id in results if tx_id in settled],
+        finished - started,
+    )
+
+    if args.cleanup:
+        with app.app_context():
+            cleanup([user_id for user_id, _ in users])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+# scripts/recompute_ratings.py
+"""Rebuild every player's rating from the full game history.
+
+Replays all completed rated games oldest first with the current
+RATING_INITIAL / RATING_K_FACTOR, streaming games from the database and
+rating them in NumPy batches. Run it after changing the rating parameters,
+with play paused -- games that finish meanwhile are overwritten. The shared
+(Redis) leaderboards are reset to reseed; workers without a message queue
+keep their own boards and need a restart:
+
+    RATING_K_FACTOR=24 python scripts/recompute_ratings.py --chunk-size 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app import create_app  # noqa: E402
+from app.services.leaderboard import reset_boards  # noqa: E402
+from app.services.rating import recompute_ratings  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        started = time.time()
+        users, games = recompute_ratings(args.chunk_size)
+        reset_boards()
+        print(f"Replayed {games} games for {users} players in {time.time() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
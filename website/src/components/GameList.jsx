@@ -7,7 +7,7 @@ import './GameList.css';
 
 function GameList() {
   const { authFetch, user } = useAuth();
-  const { setActiveGame } = useGame();
+  const { socket, setActiveGame } = useGame();
   const [openGames, setOpenGames] = useState([]);
   const [loading, setLoading] = useState(false);
   const [message, setMessage] = useState('');
@@ -28,11 +28,35 @@ function GameList() {
   };
 
   useEffect(() => {
+    // With a socket, the server pushes a snapshot and then add/remove diffs
+    if (socket) {
+      const onSnapshot = (data) => {
+        setOpenGames(data.games || []);
+        setLoading(false);
+      };
+      const onAdded = (game) =>
+        setOpenGames((prev) => [game, ...prev.filter((g) => g.id !== game.id)]);
+      const onRemoved = ({ id }) =>
+        setOpenGames((prev) => prev.filter((g) => g.id !== id));
+
+      setLoading(true);
+      socket.on('lobby_snapshot', onSnapshot);
+      socket.on('open_game_added', onAdded);
+      socket.on('open_game_removed', onRemoved);
+      socket.emit('join_lobby', {});
+      return () => {
+        socket.emit('leave_lobby', {});
+        socket.off('lobby_snapshot', onSnapshot);
+        socket.off('open_game_added', onAdded);
+        socket.off('open_game_removed', onRemoved);
+      };
+    }
+
     fetchOpenGames();
     // Optionally poll for new games
     const interval = setInterval(fetchOpenGames, 30000); // Refresh every 30s
     return () => clearInterval(interval);
-  }, [authFetch]);
+  }, [authFetch, socket]);
 
   // Handle joining a game
   const handleJoinGame = async (gameId) => {
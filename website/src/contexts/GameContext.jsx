@@ -1,4 +1,4 @@
-import { createContext, useContext, useEffect, useState, useCallback } from 'react';
+import { createContext, useContext, useEffect, useRef, useState, useCallback } from 'react';
 import io from 'socket.io-client';
 import { useAuth } from './AuthContext';
 
@@ -13,6 +13,17 @@ export function GameProvider({ children }) {
   const [spectatedGame, setSpectatedGame] = useState(null);
   const [connectionStatus, setConnectionStatus] = useState('disconnected');
   const [gameError, setGameError] = useState(null);
+  // Latest game objects for the socket handlers, which are bound only once
+  const currentGameRef = useRef(null);
+  const spectatedGameRef = useRef(null);
+
+  useEffect(() => {
+    currentGameRef.current = currentGame;
+  }, [currentGame]);
+
+  useEffect(() => {
+    spectatedGameRef.current = spectatedGame;
+  }, [spectatedGame]);
 
   // Initialize WebSocket connection
   const connectSocket = useCallback(() => {
@@ -38,13 +49,55 @@ export function GameProvider({ children }) {
     });
 
     newSocket.on('game_update', (data) => {
-      if (data.id === currentGame?.id) {
+      if (data.id === currentGameRef.current?.id) {
+        currentGameRef.current = data;
         setCurrentGame(data);
-      } else if (data.id === spectatedGame?.id) {
+      } else if (data.id === spectatedGameRef.current?.id) {
+        spectatedGameRef.current = data;
         setSpectatedGame(data);
       }
     });
 
+    // Per-move deltas: `seq` is the new ply. A seq we already have (e.g. a
+    // spectator whose snapshot already included the move when it joined) is
+    // skipped; one past ply + 1 means we missed an event, so ask the server
+    // for a full snapshot. Returns false on a gap.
+    const applyMove = (gameRef, setGame, data) => {
+      const prev = gameRef.current;
+      if (!prev || prev.id !== data.game_id) return true;
+      const ply = prev.ply || 0;
+      if (data.seq <= ply) return true;
+      if (data.seq > ply + 1) {
+        newSocket.emit('resync', { game_id: data.game_id });
+        return false;
+      }
+      const next = {
+        ...prev,
+        ply: data.seq,
+        fen: data.fen,
+        current_fen: data.fen,
+        moves: prev.moves ? `${prev.moves} ${data.san}` : data.san,
+        white_time_remaining: data.white_time_remaining,
+        black_time_remaining: data.black_time_remaining,
+        last_move_at: data.last_move_at,
+      };
+      gameRef.current = next; // Later events in the same tick build on this
+      setGame(next);
+      return true;
+    };
+
+    newSocket.on('move', (data) => {
+      applyMove(currentGameRef, setCurrentGame, data);
+      applyMove(spectatedGameRef, setSpectatedGame, data);
+    });
+
+    // Spectators get moves in batches, coalesced by the server
+    newSocket.on('moves', ({ moves }) => {
+      for (const data of moves) {
+        if (!applyMove(spectatedGameRef, setSpectatedGame, data)) break; // One resync per batch
+      }
+    });
+
     newSocket.on('game_end', (data) => {
       if (data.game_id === currentGame?.id) {
         setCurrentGame((prev) => ({ ...prev, ...data, status: 'completed' }));
@@ -89,11 +142,8 @@ export function GameProvider({ children }) {
   const makeMove = useCallback(
     (gameId, moveSan) => {
       if (!socket) return;
-      socket.emit('make_move', {
-        game_id: gameId,
-        move_san: moveSan,
-        move_time: Date.now() / 1000,
-      });
+      // Clocks run on server time; the server stamps the move itself
+      socket.emit('make_move', { game_id: gameId, move_san: moveSan });
     },
     [socket]
   );
@@ -153,6 +203,7 @@ export function GameProvider({ children }) {
   return (
     <GameContext.Provider
       value={{
+        socket,
         currentGame,
         spectatedGame,
         connectionStatus,